@@ -1,10 +1,12 @@
 # /opt/box/app.py
-import logging, os, uuid, threading, zipfile, io, pathlib, datetime, platform, subprocess
+import functools, logging, os, re, stat, uuid, threading, zipfile, pathlib, datetime, platform
+from collections import OrderedDict, deque
 from typing import Optional, Literal, Dict, List, Any
 from datetime import timezone
 import serial.tools.list_ports
-from fastapi import Body, FastAPI, HTTPException, Header, Request, Response
-from fastapi.responses import FileResponse
+from fastapi import Body, FastAPI, HTTPException, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, StreamingResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.exception_handlers import request_validation_exception_handler
 from pydantic import BaseModel, Field
@@ -20,17 +22,24 @@ except ImportError:  # pragma: no cover
     except ImportError:  # pragma: no cover
         importlib_metadata = None  # type: ignore
 
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optional, schnellere JSON-Serialisierung
+    orjson = None  # type: ignore
+
 from pyBEEP.controller import (
     connect_to_potentiostats,  # liefert List[PotentiostatController]
     PotentiostatController,
 )
 # Optional: vorhandene Plot-Funktionen nutzen
 from pyBEEP.plotter import plot_cv_cycles, plot_time_series
-from progress_utils import compute_progress, estimate_planned_duration, utcnow_iso
+from progress_utils import compute_progress, estimate_planned_duration, utc_compact_ts, utcnow_iso
 from validation import (
     ValidationResult,
     UnsupportedModeError,
     validate_mode_payload,
+    validate_mode_payloads_batch,
+    result_to_dict,
 )
 import storage
 
@@ -93,6 +102,7 @@ log = logging.getLogger("rest_api")
 log.debug("REST API logger initialized at %s", _level_name(logging.getLogger().level))
 
 
+@functools.cache
 def _detect_pybeep_version() -> str:
     if "importlib_metadata" in globals() and importlib_metadata:
         try:
@@ -112,20 +122,36 @@ def _detect_pybeep_version() -> str:
     return "unknown"
 
 
+def _read_git_head(repo_root: pathlib.Path) -> Optional[str]:
+    """Resolve HEAD to a short commit hash by reading .git directly (no git subprocess)."""
+    git_dir = repo_root / ".git"
+    if git_dir.is_file():  # worktree/submodule: "gitdir: <path>"
+        target = git_dir.read_text(encoding="utf-8").strip().partition("gitdir:")[2].strip()
+        git_dir = (repo_root / target).resolve()
+    head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    if not head.startswith("ref:"):
+        return head[:7] or None
+    ref = head[4:].strip()
+    ref_file = git_dir / ref
+    if ref_file.is_file():
+        return ref_file.read_text(encoding="utf-8").strip()[:7] or None
+    packed = git_dir / "packed-refs"
+    if packed.is_file():
+        for line in packed.read_text(encoding="utf-8").splitlines():
+            sha, _, name = line.partition(" ")
+            if name == ref:
+                return sha[:7]
+    return None
+
+
+@functools.cache
 def _detect_build_identifier() -> str:
     env_build = os.getenv("BOX_BUILD") or os.getenv("BOX_BUILD_ID")
     if env_build:
         return env_build
     repo_root = pathlib.Path(__file__).resolve().parent.parent
     try:
-        result = subprocess.run(
-            ["git", "rev-parse", "--short", "HEAD"],
-            capture_output=True,
-            text=True,
-            check=True,
-            cwd=str(repo_root),
-        )
-        commit = (result.stdout or "").strip()
+        commit = _read_git_head(repo_root)
         if commit:
             return commit
     except Exception:
@@ -148,6 +174,12 @@ def http_error(status_code: int, code: str, message: str, hint: Optional[str] =
 PYBEEP_VERSION = _detect_pybeep_version()
 PYTHON_VERSION = platform.python_version()
 BUILD_IDENTIFIER = _detect_build_identifier()
+VERSION_PAYLOAD: Dict[str, str] = {
+    "api": API_VERSION,
+    "pybeep": PYBEEP_VERSION,
+    "python": PYTHON_VERSION,
+    "build": BUILD_IDENTIFIER,
+}
 
 # ---------- Geräte-Registry ----------
 class DeviceInfo(BaseModel):
@@ -157,18 +189,29 @@ class DeviceInfo(BaseModel):
 
 DEVICES: Dict[str, PotentiostatController] = {}   # slot -> controller
 DEV_META: Dict[str, DeviceInfo] = {}              # slot -> info
-DEVICE_SCAN_LOCK = threading.Lock()
+DEVICE_SCAN_LOCK = threading.Lock()     # schuetzt DEVICES/DEV_META (nur kurz gehalten)
+DEVICE_RESCAN_LOCK = threading.Lock()   # serialisiert den (langsamen) Serial-Scan
+# Antwort-Caches fuer /devices, /modes und /modes/{mode}/params; pro Scan neu aufgebaut
+_DEVICES_CACHE: List[Dict[str, Any]] = []
+_MODES_CACHE: Optional[Any] = None
+_MODE_PARAMS_CACHE: Dict[str, Dict[str, str]] = {}
+# Scan-Generation: Lookups, die waehrend eines Rescans laufen, schreiben nicht in den neuen Cache
+_DEVICE_CACHE_GEN = 0
+
 
 def discover_devices():
-    with DEVICE_SCAN_LOCK:
-        DEVICES.clear()
-        DEV_META.clear()
+    global _DEVICES_CACHE, _MODES_CACHE, _DEVICE_CACHE_GEN
+    # Der Scan selbst laeuft ausserhalb von DEVICE_SCAN_LOCK, damit async
+    # Endpunkte waehrend eines Rescans nicht den Event-Loop blockieren.
+    with DEVICE_RESCAN_LOCK:
         controllers = connect_to_potentiostats()
         ports = {p.device: p for p in serial.tools.list_ports.comports()}
 
+        devices: Dict[str, PotentiostatController] = {}
+        meta: Dict[str, DeviceInfo] = {}
         for i, ctrl in enumerate(controllers, start=1):
             slot = f"slot{i:02d}"
-            DEVICES[slot] = ctrl
+            devices[slot] = ctrl
             try:
                 port_name = ctrl.device.device.serial.port
                 serial_info = ports.get(port_name)
@@ -176,7 +219,25 @@ def discover_devices():
             except Exception:
                 port_name, serial_number = "<unknown>", None
 
-            DEV_META[slot] = DeviceInfo(slot=slot, port=str(port_name), sn=serial_number)
+            meta[slot] = DeviceInfo(slot=slot, port=str(port_name), sn=serial_number)
+
+        devices_payload = [meta[s].model_dump() for s in sorted(meta)]
+        modes_payload = None
+        if controllers:
+            try:
+                modes_payload = controllers[0].get_available_modes()
+            except Exception:
+                log.exception("Failed to query available modes after device scan")
+
+        with DEVICE_SCAN_LOCK:
+            DEVICES.clear()
+            DEVICES.update(devices)
+            DEV_META.clear()
+            DEV_META.update(meta)
+            _DEVICES_CACHE = devices_payload
+            _MODES_CACHE = modes_payload
+            _MODE_PARAMS_CACHE.clear()
+            _DEVICE_CACHE_GEN += 1
 
 # ---------- Job-Modelle ----------
 class JobRequest (BaseModel):
@@ -193,6 +254,12 @@ class JobRequest (BaseModel):
     make_plot: bool = True
 
 
+@functools.lru_cache(maxsize=256)
+def _sanitize_segment_cached(value: str, field_name: str) -> str:
+    """Memoized _sanitize_path_segment for the small, fixed set of slot/mode names."""
+    return _sanitize_path_segment(value, field_name)
+
+
 def _build_run_storage_info(req: JobRequest) -> RunStorageInfo:
     subdir_source = req.subdir
     if _value_or_none(subdir_source) is None:
@@ -253,14 +320,95 @@ class JobOverview(BaseModel):
 class JobStatusBulkRequest(BaseModel):
     run_ids: List[str] = Field(..., min_length=1, description="run_id list for bulk status lookup")
 
-JOBS: Dict[str, JobStatus] = {}            # run_id -> status
-JOB_LOCK = threading.Lock()
-SLOT_STATE_LOCK = threading.Lock()
-SLOT_RUNS: Dict[str, str] = {}             # slot -> run_id
+class CancelFlag(threading.Event):
+    """Cancel-Event eines Runs, das beim Setzen zusaetzlich registrierte Waiter weckt."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._waiters: set[threading.Event] = set()
+        self._waiters_lock = threading.Lock()
+
+    def set(self) -> None:
+        super().set()
+        with self._waiters_lock:
+            waiters = list(self._waiters)
+        for waiter in waiters:
+            waiter.set()
+
+    def add_waiter(self, waiter: threading.Event) -> None:
+        with self._waiters_lock:
+            self._waiters.add(waiter)
+        if self.is_set():
+            waiter.set()
+
+    def remove_waiter(self, waiter: threading.Event) -> None:
+        with self._waiters_lock:
+            self._waiters.discard(waiter)
+
+
+class RunLock:
+    """Per-run lock for job mutations; publishes a fresh read snapshot on every release.
+
+    Readers use JOB_SNAPSHOTS without taking any lock: the published objects are
+    never mutated, only replaced (a dict get/set is atomic under the GIL).
+    """
+
+    def __init__(self, run_id: str) -> None:
+        self.run_id = run_id
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "RunLock":
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        try:
+            job = JOBS.get(self.run_id)
+            if job is not None:
+                JOB_SNAPSHOTS[self.run_id] = _snapshot_shallow(job)
+        finally:
+            self._lock.release()
+
+
+JOBS: Dict[str, JobStatus] = {}            # run_id -> status (nur unter RunLock mutieren)
+JOB_SNAPSHOTS: Dict[str, JobStatus] = {}   # run_id -> veroeffentlichter, unveraenderlicher Stand
+JOB_LOCK = threading.Lock()                # nur fuer Writer der Registry (Anlage/Rollback)
+JOB_LOCKS: Dict[str, RunLock] = {}         # run_id -> lock fuer Status-Mutationen dieses Runs
+SLOT_STATE_LOCK = threading.Lock()        # serialisiert nur Writer von SLOT_RUNS
+SLOT_RUNS: Dict[str, str] = {}             # slot -> run_id; unveraenderlich, wird bei Aenderung neu gebunden
 JOB_META: Dict[str, Dict[str, Any]] = {}   # run_id -> metadata bag
 JOB_GROUP_IDS: Dict[str, str] = {}         # run_id -> provided group identifier (raw)
 JOB_GROUP_FOLDERS: Dict[str, str] = {}     # run_id -> sanitized storage folder name
-CANCEL_FLAGS: Dict[str, threading.Event] = {}  # run_id -> cancel flag
+CANCEL_FLAGS: Dict[str, CancelFlag] = {}   # run_id -> cancel flag
+# Sekundaer-Indizes fuer /jobs-Filter; JOB_INDEX_LOCK wird nur kurz und als innerster Lock gehalten
+JOB_INDEX_LOCK = threading.Lock()
+JOBS_BY_STATE: Dict[str, set[str]] = {}    # job.status -> run_ids
+JOBS_BY_GROUP: Dict[str, set[str]] = {}    # normalisierte Gruppe (lower) -> run_ids
+JOB_GROUP_NORM: Dict[str, frozenset[str]] = {}  # run_id -> normalisierte Gruppen-Keys (einmal beim Start)
+
+
+def _claim_slots(slots: List[str], run_id: str) -> List[str]:
+    """Reserve slots for run_id; returns the busy slots (and reserves nothing) on conflict."""
+    global SLOT_RUNS
+    busy = sorted(s for s in slots if s in SLOT_RUNS)  # lock-freier Schnelltest
+    if busy:
+        return busy
+    with SLOT_STATE_LOCK:
+        current = SLOT_RUNS
+        busy = sorted(s for s in slots if s in current)
+        if not busy:
+            SLOT_RUNS = {**current, **{s: run_id for s in slots}}
+    return busy
+
+
+def _release_slots(slots: List[str], run_id: str) -> None:
+    """Free the given slots if they are still held by run_id."""
+    global SLOT_RUNS
+    with SLOT_STATE_LOCK:
+        current = SLOT_RUNS
+        owned = {s for s in slots if current.get(s) == run_id}
+        if owned:
+            SLOT_RUNS = {s: rid for s, rid in current.items() if s not in owned}
 
 
 def record_job_meta(run_id: str, mode: str, params: Dict[str, Any]) -> None:
@@ -298,6 +446,42 @@ def _derive_group_folder(run_id: str) -> Optional[str]:
     return None
 
 
+def _group_index_keys(*values: Optional[str]) -> frozenset[str]:
+    keys = set()
+    for value in values:
+        normalized = _normalize_group_value(value)
+        if normalized:
+            keys.add(normalized.lower())
+    return frozenset(keys)
+
+
+def _index_job(run_id: str, status: str, group_keys: frozenset[str]) -> None:
+    with JOB_INDEX_LOCK:
+        JOB_GROUP_NORM[run_id] = group_keys
+        JOBS_BY_STATE.setdefault(status, set()).add(run_id)
+        for key in group_keys:
+            JOBS_BY_GROUP.setdefault(key, set()).add(run_id)
+
+
+def _unindex_job(run_id: str) -> None:
+    with JOB_INDEX_LOCK:
+        for bucket in JOBS_BY_STATE.values():
+            bucket.discard(run_id)
+        # nur die Gruppen-Buckets dieses Runs anfassen statt alle zu durchlaufen
+        for key in JOB_GROUP_NORM.pop(run_id, frozenset()):
+            JOBS_BY_GROUP.get(key, set()).discard(run_id)
+
+
+def _set_job_status_locked(job: JobStatus, status: str) -> None:
+    """Change job.status and keep JOBS_BY_STATE in sync; caller holds the run's lock."""
+    old = job.status
+    job.status = status
+    if old != status:
+        with JOB_INDEX_LOCK:
+            JOBS_BY_STATE.get(old, set()).discard(job.run_id)
+            JOBS_BY_STATE.setdefault(status, set()).add(job.run_id)
+
+
 def _job_overview_status(job: JobStatus) -> Literal["queued", "running", "done", "failed", "cancelled"]:
     slot_states = [slot.status for slot in job.slots]
     if slot_states and all(state == "queued" for state in slot_states):
@@ -305,23 +489,35 @@ def _job_overview_status(job: JobStatus) -> Literal["queued", "running", "done",
     return job.status
 
 
+def _snapshot_shallow(job: JobStatus) -> JobStatus:
+    """Shallow clone of a job with fresh slot objects.
+
+    Workers only ever reassign list fields (files, remaining_modes, ...), never
+    mutate them in place, so sharing the list references is safe. model_construct
+    skips re-validation; the fields were validated when they were written.
+    """
+    return JobStatus.model_construct(
+        **{**job.__dict__, "slots": [SlotStatus.model_construct(**slot.__dict__) for slot in job.slots]}
+    )
+
+
 def job_snapshot(job: JobStatus) -> JobStatus:
-    copy = job.model_copy(deep=True)
+    """Return a progress-annotated copy of a published job snapshot (see RunLock).
+
+    Runs without any lock: the published snapshot is immutable, and progress is
+    written to a private top-level copy that shares the (read-only) slots.
+    """
+    copy = job.model_copy()
 
-    # only create/retain meta while the job is running
+    # JOB_META existiert nur solange der Job laeuft (record_job_meta); Leser legen
+    # keine Eintraege an, damit nach dem Aufraeumen nichts neu entsteht
     meta = JOB_META.get(copy.run_id)
-    if meta is None and copy.status == "running":
-        meta = JOB_META[copy.run_id] = {"mode": copy.mode, "params": {}}
-    elif meta is None:
+    if meta is None:
         meta = {"mode": copy.mode, "params": {}}
-
     params = meta.get("params") if isinstance(meta.get("params"), dict) else {}
     planned = meta.get("planned_duration_s")
     if planned is None:
         planned = estimate_planned_duration(meta.get("mode") or copy.mode, params)
-        # store planned only for running jobs to avoid re-populating after cleanup
-        if copy.status == "running":
-            meta["planned_duration_s"] = planned
 
     slot_payload = [slot.model_dump() for slot in copy.slots]
     metrics = compute_progress(
@@ -351,8 +547,23 @@ async def lifespan(app: FastAPI):
                 ctrl.device.device.serial.close()
             except Exception:
                 pass
+        try:
+            NAS.shutdown()
+        except Exception:
+            log.exception("Failed to shut down NAS manager")
+        try:
+            storage.flush_run_index()
+        except Exception:
+            log.exception("Failed to flush run index")
+
+_JSON_RESPONSE = ORJSONResponse if orjson is not None else JSONResponse
 
-app = FastAPI(title="Potentiostat Box API", version=API_VERSION, lifespan=lifespan)
+app = FastAPI(
+    title="Potentiostat Box API",
+    version=API_VERSION,
+    lifespan=lifespan,
+    default_response_class=_JSON_RESPONSE,
+)
 # TODO(metrics): optional Prometheus /metrics exporter (future)
 
 
@@ -377,33 +588,32 @@ def require_key(x_api_key: Optional[str]):
 
 
 @app.get("/version")
-def version_info() -> Dict[str, str]:
-    return {
-        "api": API_VERSION,
-        "pybeep": PYBEEP_VERSION,
-        "python": PYTHON_VERSION,
-        "build": BUILD_IDENTIFIER,
-    }
+async def version_info() -> Dict[str, str]:
+    return VERSION_PAYLOAD
 
 # ---------- Health / Geräte / Modi ----------
 @app.get("/health")
-def health(x_api_key: Optional[str] = Header(None)):
+async def health(x_api_key: Optional[str] = Header(None)):
     require_key(x_api_key)
     with DEVICE_SCAN_LOCK:
         device_count = len(DEVICES)
     return {"ok": True, "devices": device_count, "box_id": BOX_ID}
 
 @app.get("/devices")
-def list_devices(x_api_key: Optional[str] = Header(None)):
+async def list_devices(x_api_key: Optional[str] = Header(None)):
     require_key(x_api_key)
-    with DEVICE_SCAN_LOCK:
-        return [DEV_META[s].model_dump() for s in sorted(DEV_META.keys())]
+    return _DEVICES_CACHE
 
 @app.get("/modes")
-def list_modes(x_api_key: Optional[str] = Header(None)):
+async def list_modes(x_api_key: Optional[str] = Header(None)):
     require_key(x_api_key)
+    global _MODES_CACHE
+    cached = _MODES_CACHE
+    if cached is not None:
+        return cached
     # Nimm die Modi vom ersten Gerät (alle sind identisch konfiguriert)
     with DEVICE_SCAN_LOCK:
+        gen = _DEVICE_CACHE_GEN
         try:
             first = next(iter(DEVICES.values()))
         except StopIteration:
@@ -413,12 +623,20 @@ def list_modes(x_api_key: Optional[str] = Header(None)):
                 message="Keine Geraete registriert",
                 hint="Mit /admin/rescan nach neuen Geraeten suchen.",
             )
-    return first.get_available_modes()
+    modes = await run_in_threadpool(first.get_available_modes)
+    with DEVICE_SCAN_LOCK:
+        if gen == _DEVICE_CACHE_GEN:
+            _MODES_CACHE = modes
+    return modes
 
 @app.get("/modes/{mode}/params")
-def mode_params(mode: str, x_api_key: Optional[str] = Header(None)):
+async def mode_params(mode: str, x_api_key: Optional[str] = Header(None)):
     require_key(x_api_key)
+    cached = _MODE_PARAMS_CACHE.get(mode)
+    if cached is not None:
+        return cached
     with DEVICE_SCAN_LOCK:
+        gen = _DEVICE_CACHE_GEN
         try:
             first = next(iter(DEVICES.values()))
         except StopIteration:
@@ -429,7 +647,8 @@ def mode_params(mode: str, x_api_key: Optional[str] = Header(None)):
                 hint="Mit /admin/rescan nach neuen Geraeten suchen.",
             )
     try:
-        return {k: str(v) for k, v in first.get_mode_params(mode).items()}
+        mode_spec = await run_in_threadpool(first.get_mode_params, mode)
+        payload = {k: str(v) for k, v in mode_spec.items()}
     except Exception as e:
         raise http_error(
             status_code=400,
@@ -437,20 +656,26 @@ def mode_params(mode: str, x_api_key: Optional[str] = Header(None)):
             message=str(e),
             hint="Parameter entsprechend der Modus-Spezifikation pruefen.",
         )
+    with DEVICE_SCAN_LOCK:
+        if gen == _DEVICE_CACHE_GEN:
+            _MODE_PARAMS_CACHE[mode] = payload
+    return payload
 
 
-@app.post("/modes/{mode}/validate")
-def validate_mode_params(
+# Validation endpoints return a ready-made response: response_model only documents
+# the schema, the body is dumped via the cached TypeAdapter without re-validation.
+@app.post("/modes/{mode}/validate", response_model=ValidationResult)
+async def validate_mode_params(
     mode: str,
     params: Dict[str, Any] = Body(...),
     x_api_key: Optional[str] = Header(None),
-) -> ValidationResult:
+):
     """Validate mode parameter payloads without contacting any hardware."""
 
     require_key(x_api_key)
 
     try:
-        return validate_mode_payload(mode, params or {})
+        return _JSON_RESPONSE(result_to_dict(validate_mode_payload(mode, params or {})))
     except UnsupportedModeError as exc:
         raise http_error(
             status_code=404,
@@ -459,33 +684,76 @@ def validate_mode_params(
             hint="Verfuegbare Modi ueber /modes abrufen.",
         )
 
+
+# Obergrenze fuer /validate/batch: groessere Sweeps bitte in mehreren Requests
+VALIDATE_BATCH_MAX = max(1, int(os.getenv("VALIDATE_BATCH_MAX", "1000")))
+
+
+@app.post("/modes/{mode}/validate/batch", response_model=List[ValidationResult])
+async def validate_mode_params_batch(
+    mode: str,
+    payloads: List[Dict[str, Any]] = Body(...),
+    x_api_key: Optional[str] = Header(None),
+):
+    """Validate a list of parameter payloads (e.g. a parameter sweep) in one call."""
+
+    require_key(x_api_key)
+    if len(payloads) > VALIDATE_BATCH_MAX:
+        raise http_error(
+            status_code=413,
+            code="modes.batch_too_large",
+            message=f"Zu viele Payloads: {len(payloads)} (max. {VALIDATE_BATCH_MAX})",
+            hint="Sweep auf mehrere Requests aufteilen.",
+        )
+
+    try:
+        # Im Threadpool, damit ein grosser Sweep den Event-Loop (Status-Polls) nicht blockiert
+        results = await run_in_threadpool(validate_mode_payloads_batch, mode, payloads)
+        return _JSON_RESPONSE([result_to_dict(r) for r in results])
+    except UnsupportedModeError as exc:
+        raise http_error(
+            status_code=404,
+            code="modes.not_found",
+            message=str(exc),
+            hint="Verfuegbare Modi ueber /modes abrufen.",
+        )
+
+
 # ---------- Job Worker ----------
-def _update_job_status_locked(job: Optional[JobStatus]) -> None:
+def _update_job_status_locked(job: Optional[JobStatus]) -> bool:
+    """Derive the job status from its slots; caller holds the run's lock (JOB_LOCKS).
+
+    Returns True when the job finished successfully and should be uploaded; the
+    caller enqueues the upload via _enqueue_nas_upload after releasing the lock.
+    """
     if not job:
-        return
+        return False
 
     statuses = [slot.status for slot in job.slots]
     if any(state in ("queued", "running") for state in statuses):
-        job.status = "running"
+        _set_job_status_locked(job, "running")
         job.ended_at = None
-        return
+        return False
 
     if any(state == "failed" for state in statuses):
-        job.status = "failed"
+        _set_job_status_locked(job, "failed")
     elif any(state == "cancelled" for state in statuses):
-        job.status = "cancelled"
+        _set_job_status_locked(job, "cancelled")
     else:
-        job.status = "done"
+        _set_job_status_locked(job, "done")
     job.ended_at = utcnow_iso()
     #drop transient meta once job is terminal
     JOB_META.pop(job.run_id, None)
     CANCEL_FLAGS.pop(job.run_id, None)
     # NEU: Upload nur bei 'done' enqueuen (nicht bei failed/cancelled)
-    if job.status == "done":
-        try:
-            NAS.enqueue_upload(job.run_id)
-        except Exception:
-            log.exception("Failed to enqueue NAS upload for run_id=%s", job.run_id)
+    return job.status == "done"
+
+
+def _enqueue_nas_upload(run_id: str) -> None:
+    try:
+        NAS.enqueue_upload(run_id)
+    except Exception:
+        log.exception("Failed to enqueue NAS upload for run_id=%s", run_id)
 
 
 def _request_controller_abort(ctrl: PotentiostatController) -> None:
@@ -517,6 +785,75 @@ def _request_controller_abort(ctrl: PotentiostatController) -> None:
     except Exception:
         pass
 
+
+class _CancelWatcher:
+    """Abort the active measurement of one slot run once the run gets cancelled.
+
+    Measurements run inline on the slot worker thread; a single watcher thread per
+    slot run waits on the cancel flag (no polling) and only requests a controller
+    abort while a measurement is actually in progress.
+    """
+
+    def __init__(self, ctrl: PotentiostatController, cancel_event: CancelFlag, *, name: str) -> None:
+        self._ctrl = ctrl
+        self._cancel_event = cancel_event
+        self._name = name
+        self._wake = threading.Event()
+        self._lock = threading.Lock()   # schuetzt _active gegen den Abbruch
+        self._active = False
+        self._thread: Optional[threading.Thread] = None
+
+    def _watch(self) -> None:
+        self._wake.wait()
+        with self._lock:
+            if self._active and self._cancel_event.is_set():
+                log.info("Cancel requested, aborting measurement %s", self._name)
+                _request_controller_abort(self._ctrl)
+
+    def run(self, measure: Any) -> Optional[Exception]:
+        """Run measure() on the calling thread; returns its exception, if any."""
+        with self._lock:
+            if self._cancel_event.is_set():
+                return None  # Aufrufer prueft das Flag und markiert den Slot als cancelled
+            self._active = True
+            if self._thread is None:
+                self._cancel_event.add_waiter(self._wake)
+                self._thread = threading.Thread(target=self._watch, name=self._name, daemon=True)
+                self._thread.start()
+        try:
+            measure()
+        except Exception as exc:
+            return exc
+        finally:
+            with self._lock:
+                self._active = False
+        return None
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+        self._wake.set()
+        self._thread.join()
+        self._cancel_event.remove_waiter(self._wake)
+
+
+def _run_relpath(path: str, run_prefix: str) -> str:
+    """Relative path below a run; run_prefix is str(run_dir) + os.sep."""
+    if path.startswith(run_prefix):
+        return path[len(run_prefix):]
+    return os.path.relpath(path, run_prefix)
+
+
+def _list_folder_files(folder: pathlib.Path, run_dir: pathlib.Path) -> List[str]:
+    """List the files of one output folder relative to run_dir (empty on error)."""
+    run_prefix = str(run_dir) + os.sep
+    try:
+        with os.scandir(folder) as it:
+            return [_run_relpath(entry.path, run_prefix) for entry in it if entry.is_file()]
+    except Exception:
+        return []
+
+
 def _run_slot_sequence(
     run_id: str,
     run_dir: pathlib.Path,
@@ -527,92 +864,100 @@ def _run_slot_sequence(
 ):
     """Führt die Liste 'modes' nacheinander aus. Jede Messung schreibt in eigenen Mode-Unterordner."""
     ctrl = DEVICES[slot]
-    slot_segment = _sanitize_path_segment(slot, "slot")
-    cancel_event = CANCEL_FLAGS.setdefault(run_id, threading.Event())
+    slot_segment = _sanitize_segment_cached(slot, "slot")
+    # pro Slot konstant: Slot-Ordner und Dateinamen-Praefix nur einmal bauen
+    slot_dir = run_dir / "Wells" / slot_segment
+    base_prefix = f"{storage.filename_prefix}_{slot_segment}"
+    run_prefix = str(run_dir) + os.sep
+    cancel_event = CANCEL_FLAGS.setdefault(run_id, CancelFlag())
+    job_lock = JOB_LOCKS.setdefault(run_id, RunLock(run_id))
+
+    make_plot = req.make_plot
+    plot_cv, plot_ts = plot_cv_cycles, plot_time_series
 
     def _eval_plot(csv_path: pathlib.Path, mode: str, params: Dict[str, Any]) -> List[str]:
-        files: List[str] = []
+        # Erwartete Ausgaben direkt melden; Verzeichnis nur im Fehlerfall scannen
         try:
-            if req.make_plot:
+            outputs = [csv_path]
+            if make_plot:
                 png_path = csv_path.with_suffix(".png")
                 if (mode or "").upper() == "CV":
-                    plot_cv_cycles(str(csv_path), figpath=str(png_path), show=False, cycles=params.get("cycles"))
+                    plot_cv(str(csv_path), figpath=str(png_path), show=False, cycles=params.get("cycles"))
                 else:
-                    plot_time_series(str(csv_path), figpath=str(png_path), show=False)
-            folder = csv_path.parent
-            files = [str(p.relative_to(run_dir)) for p in folder.iterdir() if p.is_file()]
+                    plot_ts(str(csv_path), figpath=str(png_path), show=False)
+                outputs.append(png_path)
+            # Controller hat evtl. nichts oder unter anderem Namen geschrieben
+            if all(os.path.exists(p) for p in outputs):
+                return [_run_relpath(str(p), run_prefix) for p in outputs]
         except Exception:
-            try:
-                folder = csv_path.parent
-                files = [str(p.relative_to(run_dir)) for p in folder.iterdir() if p.is_file()]
-            except Exception:
-                files = []
-        return sorted(files)
+            pass
+        return _list_folder_files(csv_path.parent, run_dir)
 
     # Slot initial auf running setzen (einheitlich)
-    with JOB_LOCK:
+    with job_lock:
         slot_status.status = "running"
         slot_status.started_at = slot_status.started_at or utcnow_iso()
         slot_status.message = None
         job = JOBS.get(run_id)
         if job:
-            job.status = "running"
+            _set_job_status_locked(job, "running")
             job.ended_at = None
 
-    files_collected: List[str] = []
+    files_collected: set[str] = set()
     error: Optional[str] = None
+    # job.modes wurde bereits in start_job gesetzt; hier nur einmal kopieren.
+    # Restlisten vorab bauen, damit unter job_lock nur noch Referenzen zugewiesen werden
+    modes_list = list(req.modes or [])
+    remaining_by_idx = [modes_list[i + 1:] for i in range(len(modes_list))]
+    watcher = _CancelWatcher(ctrl, cancel_event, name=f"{run_id}-{slot}-cancel")
+
+    # In der Modus-Schleife genutzte Globals/Attribute einmal lokal binden
+    is_cancelled = cancel_event.is_set
+    run_measurement = watcher.run
+    apply_measurement = ctrl.apply_measurement
+    sanitize_segment = _sanitize_segment_cached
+    params_by_mode = req.params_by_mode
+    tia_gain = req.tia_gain
+    sampling_interval = req.sampling_interval
+    collect_files = files_collected.update
 
     try:
-        for idx, mode in enumerate(req.modes or []):
-            if cancel_event.is_set():
+        for idx, mode in enumerate(modes_list):
+            if is_cancelled():
                 error = "cancelled"
                 break
 
-            # Status: aktuellen/Rest-Modus setzen (auch 'mode' für Kompatibilität)
-            with JOB_LOCK:
-                job = JOBS.get(run_id)
+            # Status: aktuellen/Rest-Modus setzen (auch 'mode' für Kompatibilität);
+            # 'job' stammt aus dem Initial-Block, der Registry-Eintrag wird nie ersetzt
+            with job_lock:
                 if job:
                     job.mode = mode
                     job.current_mode = mode
-                    job.modes = list(req.modes or [])
-                    job.remaining_modes = list(req.modes[idx + 1:])
+                    job.remaining_modes = remaining_by_idx[idx]
 
             # Per-Mode Ordner/Dateinamen
-            mode_segment = _sanitize_path_segment(mode, "mode")
-            mode_dir = run_dir / "Wells" / slot_segment / mode_segment
+            mode_segment = sanitize_segment(mode, "mode")
+            mode_dir = slot_dir / mode_segment
             mode_dir.mkdir(parents=True, exist_ok=True)
-            filename_base = f"{storage.filename_prefix}_{slot_segment}_{mode_segment}"
-            filename = f"{filename_base}.csv"
-
-            params = dict(req.params_by_mode.get(mode, {}) or {})
-
-            # Messung mit Abbruchfenster in Neben-Thread
-            measurement_error: Optional[Exception] = None
-            def _runner():
-                nonlocal measurement_error
-                try:
-                    ctrl.apply_measurement(
-                        mode=mode,
-                        params=params,
-                        tia_gain=req.tia_gain,
-                        sampling_interval=req.sampling_interval,
-                        filename=filename,
-                        folder=str(mode_dir),
-                    )
-                except Exception as exc:
-                    measurement_error = exc
-
-            t = threading.Thread(target=_runner, name=f"{run_id}-{slot}-{mode}", daemon=True)
-            t.start()
-            abort_requested = False
-            while t.is_alive():
-                t.join(timeout=0.2)
-                if cancel_event.is_set() and not abort_requested:
-                    _request_controller_abort(ctrl)
-                    abort_requested = True
-            t.join()
-
-            if cancel_event.is_set():
+            filename = f"{base_prefix}_{mode_segment}.csv"
+
+            # eigene Kopie pro Slot: params_by_mode teilen sich alle Slot-Threads
+            params = dict(params_by_mode.get(mode, {}) or {})
+
+            # Messung direkt in diesem Thread; der Watcher bricht bei Cancel ab
+            measurement_error = run_measurement(
+                functools.partial(
+                    apply_measurement,
+                    mode=mode,
+                    params=params,
+                    tia_gain=tia_gain,
+                    sampling_interval=sampling_interval,
+                    filename=filename,
+                    folder=str(mode_dir),
+                )
+            )
+
+            if is_cancelled():
                 error = "cancelled"
                 break
 
@@ -622,13 +967,16 @@ def _run_slot_sequence(
 
             # Dateien einsammeln, Status fortschreiben
             csv_path = mode_dir / filename
-            files_collected.extend(_eval_plot(csv_path, mode, params))
+            collect_files(_eval_plot(csv_path, mode, params))
 
     except Exception as exc:
         error = str(exc)
+    finally:
+        watcher.close()
 
     # Slot/JOB finalisieren
-    with JOB_LOCK:
+    upload_due = False
+    with job_lock:
         if error == "cancelled":
             slot_status.status = "cancelled"
             slot_status.message = "cancelled"
@@ -645,14 +993,14 @@ def _run_slot_sequence(
         job = JOBS.get(run_id)
         if job:
             # Wenn letzter Slot fertig, Job terminiert + Modes-Felder zurücksetzen
-            _update_job_status_locked(job)
+            upload_due = _update_job_status_locked(job)
             if job.status in ("done", "failed", "cancelled"):
                 job.current_mode = None
                 job.remaining_modes = []
-                
-    with SLOT_STATE_LOCK:
-        if SLOT_RUNS.get(slot) == run_id:
-            del SLOT_RUNS[slot]
+    if upload_due:
+        _enqueue_nas_upload(run_id)
+
+    _release_slots([slot], run_id)
 
 
 def _run_one_slot(
@@ -665,30 +1013,31 @@ def _run_one_slot(
 ):
     """Ein Slot/Device abarbeiten - blockierend im Thread."""
     ctrl = DEVICES[slot]
-    slot_segment = _sanitize_path_segment(slot, "slot")
-    mode_segment = _sanitize_path_segment(req.mode, "mode")
+    slot_segment = _sanitize_segment_cached(slot, "slot")
+    mode_segment = _sanitize_segment_cached(req.mode, "mode")
     slot_dir = run_dir / "Wells" / slot_segment / mode_segment
     slot_dir.mkdir(parents=True, exist_ok=True)
     filename_base = f"{storage.filename_prefix}_{slot_segment}_{mode_segment}"
     filename = f"{filename_base}.csv"
 
-    cancel_event = CANCEL_FLAGS.setdefault(run_id, threading.Event())
+    cancel_event = CANCEL_FLAGS.setdefault(run_id, CancelFlag())
+    job_lock = JOB_LOCKS.setdefault(run_id, RunLock(run_id))
 
     if cancel_event.is_set():
-        with JOB_LOCK:
+        with job_lock:
             slot_status.status = "cancelled"
             if not slot_status.started_at:
                 slot_status.started_at = utcnow_iso()
             slot_status.ended_at = utcnow_iso()
             slot_status.message = "cancelled"
             slot_status.files = []
-            _update_job_status_locked(JOBS.get(run_id))
-        with SLOT_STATE_LOCK:
-            if SLOT_RUNS.get(slot) == run_id:
-                del SLOT_RUNS[slot]
+            upload_due = _update_job_status_locked(JOBS.get(run_id))
+        if upload_due:
+            _enqueue_nas_upload(run_id)
+        _release_slots([slot], run_id)
         return
 
-    with JOB_LOCK:
+    with job_lock:
         slot_status.status = "running"
         slot_status.started_at = utcnow_iso()
         slot_status.message = None
@@ -696,13 +1045,12 @@ def _run_one_slot(
 
     files: List[str] = []
     error: Optional[Exception] = None
-    cancelled = False
-    measurement_error: Optional[Exception] = None
 
-    def _measurement_runner():
-        nonlocal measurement_error
-        try:
-            ctrl.apply_measurement(
+    watcher = _CancelWatcher(ctrl, cancel_event, name=f"{run_id}-{slot}-cancel")
+    try:
+        measurement_error = watcher.run(
+            functools.partial(
+                ctrl.apply_measurement,
                 mode=req.mode,
                 params=req.params,
                 tia_gain=req.tia_gain,
@@ -710,28 +1058,10 @@ def _run_one_slot(
                 filename=filename,
                 folder=str(slot_dir),
             )
-        except Exception as exc:
-            measurement_error = exc
-
-    runner_thread = threading.Thread(
-        target=_measurement_runner,
-        name=f"{run_id}-{slot}-measurement",
-        daemon=True,
-    )
-    runner_thread.start()
-
-    abort_requested = False
-    while runner_thread.is_alive():
-        runner_thread.join(timeout=0.2)
-        if cancel_event.is_set():
-            cancelled = True
-            if not abort_requested:
-                _request_controller_abort(ctrl)
-                abort_requested = True
-
-    runner_thread.join()
-    if cancel_event.is_set():
-        cancelled = True
+        )
+    finally:
+        watcher.close()
+    cancelled = cancel_event.is_set()
 
     if cancelled:
         # treat controller exceptions as part of the cancellation flow
@@ -747,22 +1077,15 @@ def _run_one_slot(
                 plot_cv_cycles(str(csv_path), figpath=str(png_path), show=False, cycles=req.params.get("cycles"))
             else:
                 plot_time_series(str(csv_path), figpath=str(png_path), show=False)
-        files = [
-            str(p.relative_to(run_dir))
-            for p in slot_dir.iterdir()
-            if p.is_file()
-        ]
+            files.append(_run_relpath(str(png_path), str(run_dir) + os.sep))
+        files.append(_run_relpath(str(csv_path), str(run_dir) + os.sep))
+        # Nur existierende Ausgaben melden, sonst den Ordner auflisten
+        if not all(os.path.exists(os.path.join(run_dir, f)) for f in files):
+            files = _list_folder_files(slot_dir, run_dir)
     else:
-        try:
-            files = [
-                str(p.relative_to(run_dir))
-                for p in slot_dir.iterdir()
-                if p.is_file()
-            ]
-        except Exception:
-            files = []
+        files = _list_folder_files(slot_dir, run_dir)
 
-    with JOB_LOCK:
+    with job_lock:
         if cancelled:
             slot_status.status = "cancelled"
             slot_status.ended_at = utcnow_iso()
@@ -777,19 +1100,16 @@ def _run_one_slot(
             slot_status.status = "failed"
             slot_status.message = str(error)
             slot_status.ended_at = utcnow_iso()
-            try:
-                slot_status.files = sorted([str(p.relative_to(run_dir)) for p in slot_dir.iterdir() if p.is_file()])
-            except Exception:
-                slot_status.files = []
-        _update_job_status_locked(JOBS.get(run_id))
+            slot_status.files = sorted(_list_folder_files(slot_dir, run_dir))
+        upload_due = _update_job_status_locked(JOBS.get(run_id))
+    if upload_due:
+        _enqueue_nas_upload(run_id)
 
-    with SLOT_STATE_LOCK:
-        if SLOT_RUNS.get(slot) == run_id:
-            del SLOT_RUNS[slot]
+    _release_slots([slot], run_id)
 
 # ---------- Endpunkte: Jobs ----------
 @app.post("/jobs/status", response_model=List[JobStatus])
-def jobs_bulk_status(req: JobStatusBulkRequest, x_api_key: Optional[str] = Header(None)):
+async def jobs_bulk_status(req: JobStatusBulkRequest, x_api_key: Optional[str] = Header(None)):
     """Return snapshot data for multiple runs in a single call."""
     require_key(x_api_key)
     run_ids = [rid for rid in (req.run_ids or []) if rid]
@@ -800,23 +1120,24 @@ def jobs_bulk_status(req: JobStatusBulkRequest, x_api_key: Optional[str] = Heade
             message="Keine run_ids angegeben",
             hint="run_ids Feld im Request ausfuellen.",
         )
-    with JOB_LOCK:
-        missing = [rid for rid in run_ids if rid not in JOBS]
-        if missing:
-            missing_str = ", ".join(sorted(missing))
-            raise http_error(
-                status_code=404,
-                code="jobs.run_ids_unknown",
-                message=f"Unbekannte run_ids: {missing_str}",
-                hint="Nur bekannte run_ids anfragen.",
-            )
-        snapshots = [job_snapshot(JOBS[rid]) for rid in run_ids]
+    # lock-frei: veroeffentlichte Snapshots lesen
+    published = [JOB_SNAPSHOTS.get(rid) for rid in run_ids]
+    missing = [rid for rid, job in zip(run_ids, published) if job is None]
+    if missing:
+        missing_str = ", ".join(sorted(missing))
+        raise http_error(
+            status_code=404,
+            code="jobs.run_ids_unknown",
+            message=f"Unbekannte run_ids: {missing_str}",
+            hint="Nur bekannte run_ids anfragen.",
+        )
+    snapshots = [job_snapshot(job) for job in published]
     log.debug("jobs/status bulk request count=%d", len(run_ids))
     return snapshots
 
 
 @app.get("/jobs", response_model=List[JobOverview])
-def list_jobs(
+async def list_jobs(
     state: Optional[Literal["incomplete", "completed"]] = None,
     group_id: Optional[str] = None,
     x_api_key: Optional[str] = Header(None),
@@ -827,46 +1148,44 @@ def list_jobs(
     group_filter = _normalize_group_value(group_id)
     group_filter_lower = group_filter.lower() if group_filter else None
 
-    with JOB_LOCK:
-        run_ids = list(JOBS.keys())
-        job_entries = [(rid, JOBS[rid].model_copy(deep=True)) for rid in run_ids]
-        group_raw_map = {rid: JOB_GROUP_IDS.get(rid) for rid in run_ids}
-        group_folder_map = {rid: JOB_GROUP_FOLDERS.get(rid) for rid in run_ids}
+    # Filter ueber die Sekundaer-Indizes aufloesen statt alle JOBS zu durchlaufen
+    selected: Optional[set[str]] = None
+    states = ("running",) if state_filter == "incomplete" else ("done", "failed", "cancelled")
+    with JOB_INDEX_LOCK:
+        state_buckets = [JOBS_BY_STATE.get(s, set()) for s in states] if state_filter else None
+        if group_filter_lower:
+            in_group = JOBS_BY_GROUP.get(group_filter_lower, set())
+            if state_buckets is None:
+                selected = set(in_group)
+            else:
+                # Gruppen-Bucket ist i.d.R. klein, Status-Buckets (v.a. 'done') wachsen mit der
+                # Historie: ueber die Gruppe iterieren statt die Status-Buckets zu vereinigen
+                selected = {rid for rid in in_group if any(rid in bucket for bucket in state_buckets)}
+        elif state_buckets is not None:
+            selected = set().union(*state_buckets)
+
+    # lock-frei: dict.copy() ist unter dem GIL atomar, die Snapshots sind unveraenderlich
+    published = JOB_SNAPSHOTS.copy()
+    run_ids = list(published) if selected is None else [rid for rid in selected if rid in published]
 
     results: List[JobOverview] = []
-    for run_id, job in job_entries:
-        overview_status = _job_overview_status(job)
-        if state_filter == "incomplete" and overview_status not in ("queued", "running"):
+    for run_id in run_ids:
+        job = published[run_id]
+        # Nur die Uebersichtsfelder lesen statt den ganzen Job (inkl. files) zu kopieren
+        overview = JobOverview.model_construct(
+            run_id=run_id,
+            mode=job.mode,
+            status=_job_overview_status(job),
+            started_at=job.started_at,
+            ended_at=job.ended_at,
+            devices=[slot.slot for slot in job.slots],
+        )
+        # Index und Uebersicht stammen aus verschiedenen Momenten: Status nachpruefen
+        if state_filter == "incomplete" and overview.status not in ("queued", "running"):
             continue
-        if state_filter == "completed" and overview_status not in ("done", "failed", "cancelled"):
+        if state_filter == "completed" and overview.status not in ("done", "failed", "cancelled"):
             continue
-
-        if group_filter_lower:
-            candidate_norms = set()
-            for candidate in (
-                group_raw_map.get(run_id),
-                group_folder_map.get(run_id),
-            ):
-                normalized_candidate = _normalize_group_value(candidate)
-                if normalized_candidate:
-                    candidate_norms.add(normalized_candidate.lower())
-            normalized_folder = _normalize_group_value(_derive_group_folder(run_id))
-            if normalized_folder:
-                candidate_norms.add(normalized_folder.lower())
-            if group_filter_lower not in candidate_norms:
-                continue
-
-        devices = [slot.slot for slot in job.slots]
-        results.append(
-            JobOverview(
-                run_id=run_id,
-                mode=job.mode,
-                status=overview_status,
-                started_at=job.started_at,
-                ended_at=job.ended_at,
-                devices=devices,
-            )
-        )
+        results.append(overview)
 
     results.sort(key=lambda item: ((item.started_at or ""), item.run_id), reverse=True)
     return results
@@ -891,18 +1210,15 @@ def start_job(req: JobRequest, x_api_key: Optional[str] = Header(None)):
     if not slots:
         raise http_error(status_code=400, code="jobs.invalid_devices", message="Keine gueltigen devices angegeben", hint="Verwende Slots aus /devices oder 'all'.")
 
-    run_id = req.run_name or datetime.datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + "_" + uuid.uuid4().hex[:6]
+    run_id = req.run_name or utc_compact_ts() + "_" + uuid.uuid4().hex[:6]
 
     with JOB_LOCK:
         if run_id in JOBS:
             raise http_error(status_code=409, code="jobs.run_id_conflict", message="run_id bereits aktiv", hint="Andere run_id waehlen oder laufenden Job abwarten.")
 
-    with SLOT_STATE_LOCK:
-        busy = sorted(s for s in slots if s in SLOT_RUNS)
-        if busy:
-            raise http_error(status_code=409, code="jobs.slots_busy", message=f"Slots belegt: {', '.join(busy)}", hint="Warte bis die genannten Slots frei sind.")
-        for s in slots:
-            SLOT_RUNS[s] = run_id
+    busy = _claim_slots(slots, run_id)
+    if busy:
+        raise http_error(status_code=409, code="jobs.slots_busy", message=f"Slots belegt: {', '.join(busy)}", hint="Warte bis die genannten Slots frei sind.")
 
     slot_statuses = [SlotStatus(slot=s, status="queued") for s in slots]
     started_at = utcnow_iso()
@@ -932,11 +1248,20 @@ def start_job(req: JobRequest, x_api_key: Optional[str] = Header(None)):
             remaining_modes=list(req.modes[1:] if len(req.modes) > 1 else []),
         )
 
+        # Alles Abgeleitete (Dauer-Schätzung, Gruppen-Keys inkl. Dateisystem-
+        # Lookup) vor dem Lock berechnen; unter JOB_LOCK nur noch dict-Updates
+        # Progress-Schätzung grob anhand des ersten Modus (KISS)
+        record_job_meta(run_id, first_mode, dict(req.params_by_mode.get(first_mode, {}) or {}))
+        group_keys = _group_index_keys(raw_group_id, storage_folder, _derive_group_folder(run_id))
+        snapshot = _snapshot_shallow(job)
+        run_lock = RunLock(run_id)
+        cancel_flag = CancelFlag()
+
         with JOB_LOCK:
             JOBS[run_id] = job
-            CANCEL_FLAGS[run_id] = threading.Event()
-            # Progress-Schätzung grob anhand des ersten Modus (KISS)
-            record_job_meta(run_id, first_mode, dict(req.params_by_mode.get(first_mode, {}) or {}))
+            JOB_SNAPSHOTS[run_id] = snapshot
+            JOB_LOCKS[run_id] = run_lock
+            CANCEL_FLAGS[run_id] = cancel_flag
             if raw_group_id:
                 JOB_GROUP_IDS[run_id] = raw_group_id
             else:
@@ -945,6 +1270,7 @@ def start_job(req: JobRequest, x_api_key: Optional[str] = Header(None)):
                 JOB_GROUP_FOLDERS[run_id] = storage_folder
             else:
                 JOB_GROUP_FOLDERS.pop(run_id, None)
+            _index_job(run_id, job.status, group_keys)
 
         log.info("Job start run_id=%s modes=%s devices=%s slots=%s", run_id, req.modes, req.devices if req.devices != "all" else "all", slots)
         log.debug("Job storage run_id=%s group_id=%s folder=%s experiment=%s", run_id, raw_group_id or "-", storage_folder or "-", storage_info.experiment)
@@ -957,21 +1283,21 @@ def start_job(req: JobRequest, x_api_key: Optional[str] = Header(None)):
             )
             t.start()
     except Exception:
-        with SLOT_STATE_LOCK:
-            for s in slots:
-                if SLOT_RUNS.get(s) == run_id:
-                    del SLOT_RUNS[s]
+        _release_slots(slots, run_id)
         with JOB_LOCK:
             JOBS.pop(run_id, None)
+            JOB_SNAPSHOTS.pop(run_id, None)
+            JOB_LOCKS.pop(run_id, None)
             JOB_GROUP_IDS.pop(run_id, None)
             JOB_GROUP_FOLDERS.pop(run_id, None)
+        _unindex_job(run_id)
         CANCEL_FLAGS.pop(run_id, None)
         JOB_META.pop(run_id, None)
         _forget_run_directory(run_id)
+        _forget_run_files(run_id)
         raise
 
-    with JOB_LOCK:
-        return job_snapshot(JOBS[run_id])
+    return job_snapshot(JOB_SNAPSHOTS.get(run_id) or _snapshot_shallow(job))
 
 
 
@@ -979,20 +1305,19 @@ def start_job(req: JobRequest, x_api_key: Optional[str] = Header(None)):
 def cancel_job(run_id: str, x_api_key: Optional[str] = Header(None)):
     """Signal cancellation for a running or queued job."""
     require_key(x_api_key)
-    with JOB_LOCK:
-        job = JOBS.get(run_id)
-        if not job:
-            raise http_error(
-                status_code=404,
-                code="jobs.not_found",
-                message="Unbekannte run_id",
-                hint="run_id pruefen oder Liste der Jobs abrufen.",
-            )
-
-        event = CANCEL_FLAGS.get(run_id)
-        if event is None:
-            event = CANCEL_FLAGS[run_id] = threading.Event()
+    # nur der Lock des Runs; Registry-Lookups sind einzelne (atomare) dict-Zugriffe
+    job = JOBS.get(run_id)
+    if not job:
+        raise http_error(
+            status_code=404,
+            code="jobs.not_found",
+            message="Unbekannte run_id",
+            hint="run_id pruefen oder Liste der Jobs abrufen.",
+        )
+    event = CANCEL_FLAGS.setdefault(run_id, CancelFlag())
+    job_lock = JOB_LOCKS.setdefault(run_id, RunLock(run_id))
 
+    with job_lock:
         if job.status in ("done", "failed", "cancelled"):
             return {"run_id": run_id, "status": job.status}
 
@@ -1008,32 +1333,50 @@ def cancel_job(run_id: str, x_api_key: Optional[str] = Header(None)):
                 slot_status.files = []
                 queued_slots.append(slot_status.slot)
 
-        _update_job_status_locked(job)
+        upload_due = _update_job_status_locked(job)
+    if upload_due:
+        _enqueue_nas_upload(run_id)
 
     if queued_slots:
-        with SLOT_STATE_LOCK:
-            for slot in queued_slots:
-                if SLOT_RUNS.get(slot) == run_id:
-                    del SLOT_RUNS[slot]
+        _release_slots(queued_slots, run_id)
 
     log.info("Job cancel requested run_id=%s queued_slots=%d", run_id, len(queued_slots))
     return {"run_id": run_id, "status": "cancelled"}
 
 
 @app.get("/jobs/{run_id}", response_model=JobStatus)
-def job_status(run_id: str, x_api_key: Optional[str] = Header(None)):
+async def job_status(run_id: str, x_api_key: Optional[str] = Header(None)):
     """Return the latest status snapshot for a single run."""
     require_key(x_api_key)
-    with JOB_LOCK:
-        job = JOBS.get(run_id)
-        if not job:
-            raise http_error(
-                status_code=404,
-                code="jobs.not_found",
-                message="Unbekannte run_id",
-                hint="run_id pruefen oder Liste der Jobs abrufen.",
-            )
-        return job_snapshot(job)
+    job = JOB_SNAPSHOTS.get(run_id)  # lock-frei, siehe RunLock
+    if not job:
+        raise http_error(
+            status_code=404,
+            code="jobs.not_found",
+            message="Unbekannte run_id",
+            hint="run_id pruefen oder Liste der Jobs abrufen.",
+        )
+    return job_snapshot(job)
+
+
+# run_id -> (st_mtime_ns des Run-Ordners, sortierte Dateiliste); nur fuer abgeschlossene Runs.
+# Neue Dateien entstehen in Unterordnern (aendern die Run-mtime nicht), daher werden laufende
+# Runs nie gecacht; UPLOAD_DONE im Run-Ordner aktualisiert die mtime und invalidiert den Eintrag.
+# Als LRU begrenzt; Eintraege geloeschter Runs fallen spaetestens dort heraus (der Endpunkt
+# antwortet fuer sie ohnehin 404, bevor der Cache gelesen wird).
+_FILES_CACHE: "OrderedDict[str, tuple[int, List[str]]]" = OrderedDict()
+_FILES_CACHE_MAX = 256
+_FILES_CACHE_LOCK = threading.Lock()
+
+
+def _forget_run_files(run_id: str) -> None:
+    with _FILES_CACHE_LOCK:
+        _FILES_CACHE.pop(run_id, None)
+
+
+def _run_is_active(run_id: str) -> bool:
+    job = JOBS.get(run_id)
+    return job is not None and job.status == "running"
 
 
 @app.get("/runs/{run_id}/files")
@@ -1047,16 +1390,40 @@ def list_run_files(run_id: str, x_api_key: Optional[str] = Header(None)):
             message="Run nicht gefunden",
             hint="run_id pruefen oder vorhandene Runs auflisten.",
         )
-    files = [
-        path.relative_to(run_dir).as_posix()
-        for path in run_dir.rglob("*")
-        if path.is_file()
-    ]
-    files.sort()
+    cacheable = not _run_is_active(run_id)
+    try:
+        mtime = run_dir.stat().st_mtime_ns
+    except OSError:
+        mtime, cacheable = 0, False
+    with _FILES_CACHE_LOCK:
+        cached = _FILES_CACHE.get(run_id)
+        if cached is not None:
+            _FILES_CACHE.move_to_end(run_id)
+    if cacheable and cached and cached[0] == mtime:
+        files = cached[1]
+    else:
+        run_prefix = str(run_dir) + os.sep
+        files = [
+            _run_relpath(entry.path, run_prefix).replace(os.sep, "/")
+            for entry in storage.iter_files(run_dir)
+        ]
+        files.sort()
+        if cacheable:
+            with _FILES_CACHE_LOCK:
+                _FILES_CACHE[run_id] = (mtime, files)
+                _FILES_CACHE.move_to_end(run_id)
+                while len(_FILES_CACHE) > _FILES_CACHE_MAX:
+                    _FILES_CACHE.popitem(last=False)
     log.info("List files run_id=%s count=%d", run_id, len(files))
     return {"files": files}
 
 
+# Laufwerksangaben ("C:") nur unter Windows ablehnen; unter POSIX ist "a:b.csv" ein normaler Name
+_BAD_RUN_PATH = re.compile(
+    r"(^[\\/]|(^|[\\/])\.\.([\\/]|$)|\x00" + (r"|^[A-Za-z]:" if os.name == "nt" else "") + ")"
+)
+
+
 @app.get("/runs/{run_id}/file")
 def get_run_file(run_id: str, path: str, x_api_key: Optional[str] = Header(None)):
     require_key(x_api_key)
@@ -1076,10 +1443,11 @@ def get_run_file(run_id: str, path: str, x_api_key: Optional[str] = Header(None)
             hint="Pfad relativ zum Run-Verzeichnis angeben.",
         )
 
-    run_root = run_dir.resolve()
-    try:
-        target_path = (run_dir / path).resolve(strict=True)
-    except FileNotFoundError:
+    # Traversal-Schutz rein lexikalisch (kein realpath pro Request): absolute
+    # Pfade, ".."-Segmente und Nullbytes vorab ablehnen, danach Praefix-Check
+    run_root = os.path.normpath(str(run_dir))
+    candidate = os.path.normpath(os.path.join(run_root, path))
+    if _BAD_RUN_PATH.search(path) or not candidate.startswith(run_root + os.sep):
         raise http_error(
             status_code=404,
             code="runs.file_not_found",
@@ -1087,9 +1455,20 @@ def get_run_file(run_id: str, path: str, x_api_key: Optional[str] = Header(None)
             hint="Pfad relativ zum Run-Verzeichnis angeben.",
         )
 
+    # Symlinks in beliebigen Pfadkomponenten (z.B. <run>/slot01 -> /etc) aufloesen
+    # und nur ausliefern, wenn das Ziel innerhalb des Run-Verzeichnisses liegt
+    real_root = os.path.realpath(run_root)
+    real_candidate = os.path.realpath(candidate)
     try:
-        target_path.relative_to(run_root)
+        inside = os.path.commonpath([real_root, real_candidate]) == real_root
     except ValueError:
+        inside = False
+    # Ein stat() fuer Typpruefung und FileResponse (Starlette stat't sonst erneut)
+    try:
+        st = os.stat(real_candidate) if inside else None
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
         raise http_error(
             status_code=404,
             code="runs.file_not_found",
@@ -1097,44 +1476,86 @@ def get_run_file(run_id: str, path: str, x_api_key: Optional[str] = Header(None)
             hint="Pfad relativ zum Run-Verzeichnis angeben.",
         )
 
-    if not target_path.is_file():
-        raise http_error(
-            status_code=404,
-            code="runs.file_not_found",
-            message="Datei nicht gefunden",
-            hint="Pfad relativ zum Run-Verzeichnis angeben.",
-        )
-
-    rel_path = target_path.relative_to(run_root).as_posix()
+    target_path = pathlib.Path(real_candidate)
+    rel_path = _run_relpath(candidate, run_root + os.sep)
     log.info("Serve file run_id=%s path=%s", run_id, rel_path)
-    return FileResponse(path=target_path, filename=target_path.name)
+    # Kein Kompressions-Middleware im Spiel: uvicorn kann per sendfile ausliefern
+    return FileResponse(path=target_path, filename=target_path.name, stat_result=st)
+
+
+_ZIP_STORED_SUFFIXES = frozenset({".png", ".jpg", ".jpeg", ".zip", ".gz", ".npz"})  # bereits komprimiert
+_ZIP_CHUNK_SIZE = 1024 * 1024
+_ZIP_COMPRESSLEVEL = 1  # CSV-Daten: Level 1 ist ein Vielfaches schneller bei kaum groesserem Archiv
+# Level je Eintrag: ab Python 3.13 oeffentlich als compress_level, davor nur _compresslevel
+_ZIPINFO_LEVEL_ATTR = "compress_level" if hasattr(zipfile.ZipInfo, "compress_level") else "_compresslevel"
+
+
+class _ZipStream:
+    """Write-only sink for zipfile; collects written bytes until they are drained."""
+
+    def __init__(self) -> None:
+        self._chunks: deque[bytes] = deque()
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _iter_run_zip(run_id: str, run_dir: pathlib.Path):
+    """Yield a ZIP archive of run_dir chunk by chunk (zipfile streams via data descriptors)."""
+    sink = _ZipStream()
+    file_count = 0
+    size = 0
+    run_prefix = str(run_dir) + os.sep
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=_ZIP_COMPRESSLEVEL) as zf:
+        for entry in storage.iter_files(run_dir):
+            path = entry.path
+            zinfo = zipfile.ZipInfo.from_file(path, arcname=_run_relpath(path, run_prefix))
+            if os.path.splitext(path)[1].lower() in _ZIP_STORED_SUFFIXES:
+                zinfo.compress_type = zipfile.ZIP_STORED
+            else:
+                zinfo.compress_type = zipfile.ZIP_DEFLATED
+                # zf.open() uebernimmt compresslevel des Archivs nicht (nur write/writestr)
+                setattr(zinfo, _ZIPINFO_LEVEL_ATTR, _ZIP_COMPRESSLEVEL)
+            with open(path, "rb") as src, zf.open(zinfo, "w", force_zip64=True) as dest:
+                while block := src.read(_ZIP_CHUNK_SIZE):
+                    dest.write(block)
+                    chunk = sink.drain()
+                    if chunk:
+                        size += len(chunk)
+                        yield chunk
+            file_count += 1
+    chunk = sink.drain()
+    if chunk:
+        size += len(chunk)
+        yield chunk
+    log.info("Serve zip run_id=%s files=%d size=%d", run_id, file_count, size)
 
 
 @app.get("/runs/{run_id}/zip")
-def get_run_zip(run_id: str, x_api_key: Optional[str] = Header(None)):
+async def get_run_zip(run_id: str, x_api_key: Optional[str] = Header(None)):
     require_key(x_api_key)
-    run_dir = _resolve_run_directory(run_id)
-    if not run_dir.is_dir():
+    run_dir = await run_in_threadpool(_resolve_run_directory, run_id)
+    if not await run_in_threadpool(run_dir.is_dir):
         raise http_error(
             status_code=404,
             code="runs.not_found",
             message="Run nicht gefunden",
             hint="run_id pruefen oder vorhandene Runs auflisten.",
         )
-    # ZIP im Speicher bauen
-    buf = io.BytesIO()
-    file_count = 0
-    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        for path in run_dir.rglob("*"):
-            if path.is_file():
-                zf.write(path, arcname=path.relative_to(run_dir))
-                file_count += 1
-    buf.seek(0)
-    content = buf.read()
-    log.info("Serve zip run_id=%s files=%d size=%d", run_id, file_count, len(content))
-    return Response(content=content,
-                    media_type="application/zip",
-                    headers={"Content-Disposition": f'attachment; filename="{run_id}.zip"'})
+    # ZIP gestreamt bauen statt komplett im Speicher; Starlette iteriert den
+    # synchronen Generator im Threadpool, DEFLATE blockiert also nie den Event-Loop
+    return StreamingResponse(_iter_run_zip(run_id, run_dir),
+                             media_type="application/zip",
+                             headers={"Content-Disposition": f'attachment; filename="{run_id}.zip"'})
 
 # ---------- NAS Storage Requests ----------
 
@@ -1146,6 +1567,7 @@ class SMBSetupRequest(BaseModel):
     base_subdir: str = ""     # optionaler Unterordner innerhalb des Shares
     retention_days: int = 14
     domain: Optional[str] = None
+    max_channels: int = 1     # SMB3 Multichannel fuer CIFS-Mounts (1 = aus)
 
 @app.post("/nas/setup")
 def nas_setup(req: SMBSetupRequest, x_api_key: Optional[str] = Header(None)):
@@ -1158,6 +1580,7 @@ def nas_setup(req: SMBSetupRequest, x_api_key: Optional[str] = Header(None)):
         base_subdir=req.base_subdir,
         retention_days=req.retention_days,
         domain=req.domain,
+        max_channels=req.max_channels,
     )
     return result
 
@@ -1,15 +1,67 @@
 # /opt/box/nas.py
 from __future__ import annotations
-import datetime as _dt
-import json, logging, os, shlex, shutil, subprocess, threading, time
+from collections import deque
+import hashlib, json, logging, os, shlex, signal, subprocess, threading, time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, Optional
 
 from fastapi import HTTPException
 
+try:
+    import xxhash  # type: ignore
+except ImportError:  # pragma: no cover - optional, schnellerer Inhalts-Hash
+    xxhash = None  # type: ignore
+
 # Wir nutzen storage-Helfer für Pfad-Auflösung
 import storage
+from nas_common import parse_rsync_stats, synced_file_count
+from progress_utils import utcnow_iso
+
+
+# OpenSSH-Multiplexing: Folge-Aufrufe (probe/mkdir/rsync/verify) nutzen eine bestehende
+# Verbindung statt jeweils einen neuen TCP+SSH-Handshake zu machen
+SSH_CONTROL_PATH = "/opt/box/.ssh/cm-%r@%h:%p"
+SSH_MUX_OPTS = (
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPersist=60",
+    "-o", f"ControlPath={SSH_CONTROL_PATH}",
+)
+# Nur die letzten Zeilen von stdout/stderr langlaufender Kommandos behalten
+RUN_TAIL_LINES = 64
+# So viele stderr-Zeilen kurzer Kommandos landen im Log bzw. in der Probe-Meldung
+ERR_TAIL_LINES = 3
+# Timeout fuer den SSH-Probe (haengende Sessions nicht ewig halten)
+PROBE_TIMEOUT_S = 30
+# Sammelfenster: Uploads derselben Gruppe innerhalb dieser Zeit teilen sich ein rsync
+UPLOAD_COALESCE_S = 2.0
+# Sidecar mit dem Inhalts-Hash des zuletzt erfolgreich hochgeladenen Stands
+UPLOAD_HASH_NAME = ".upload_hash"
+# Marker-Dateien, die selbst nicht in den Inhalts-Hash eingehen
+_UPLOAD_MARKERS = frozenset({"UPLOAD_DONE", UPLOAD_HASH_NAME, "upload_failed"})
+
+
+def _err_tail(stderr: Optional[str]) -> str:
+    """Letzte ERR_TAIL_LINES nicht-leere stderr-Zeilen, einzeilig fuer Log/Meldung."""
+    lines = [line.strip() for line in (stderr or "").splitlines() if line.strip()]
+    return " | ".join(lines[-ERR_TAIL_LINES:])
+
+
+def _content_hash(run_dir: Path) -> str:
+    """Günstiger Hash über (relativer Pfad, Größe, mtime) aller Dateien eines Runs."""
+    prefix = str(run_dir) + os.sep
+    items = []
+    for entry in storage.iter_files(run_dir):
+        if entry.name in _UPLOAD_MARKERS:
+            continue
+        st = entry.stat()
+        items.append((entry.path[len(prefix):], st.st_size, st.st_mtime_ns))
+    items.sort()
+    data = json.dumps(items, separators=(",", ":")).encode("utf-8")
+    if xxhash is not None:
+        return xxhash.xxh3_64(data).hexdigest()
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
 
 
 @dataclass
@@ -22,6 +74,28 @@ class NASConfig:
     retention_days: int = 14
 
 
+@dataclass(frozen=True)
+class SshProfile:
+    """Aus NASConfig abgeleitete, fertig gebaute SSH/rsync-Argumente (einmal je Config)."""
+    ssh_argv: tuple[str, ...]   # ssh + Optionen + user@host
+    rsync_e: str                # ssh-Kommando fuer rsync -e (ohne Ziel)
+    rsync_target: str           # "user@host:"
+    remote_base: str            # remote_base_dir ohne abschliessenden Slash
+
+    @classmethod
+    def from_config(cls, cfg: NASConfig) -> "SshProfile":
+        ssh_opts = (
+            "ssh", "-i", cfg.key_path, "-o", "BatchMode=yes", "-o", "StrictHostKeyChecking=no",
+            *SSH_MUX_OPTS, "-p", str(cfg.port),
+        )
+        return cls(
+            ssh_argv=(*ssh_opts, f"{cfg.username}@{cfg.host}"),
+            rsync_e=" ".join(shlex.quote(opt) for opt in ssh_opts),
+            rsync_target=f"{cfg.username}@{cfg.host}:",
+            remote_base=cfg.remote_base_dir.rstrip("/"),
+        )
+
+
 class NASManager:
     """
     KISS-Manager für:
@@ -37,7 +111,18 @@ class NASManager:
         self.log = logger or logging.getLogger("nas")
         self._lock = threading.Lock()
         self._uploading: set[str] = set()
+        # Wartende Uploads je Gruppen-Verzeichnis (Elternordner der Runs)
+        self._pending: Dict[str, set[str]] = {}
+        self._pending_cv = threading.Condition(self._lock)
+        self._coalescer: Optional[threading.Thread] = None
         self._health_state: Dict[str, Any] = {"ok": False, "last_checked": None, "message": "not checked"}
+        # (st_mtime_ns, config, ssh-profil) der zuletzt geparsten Konfigurationsdatei
+        self._cfg_cache: Optional[tuple[int, NASConfig, SshProfile]] = None
+        # Begrenzte Anzahl paralleler Uploads statt eines Threads pro Run
+        self._upload_pool = ThreadPoolExecutor(
+            max_workers=max(1, int(os.environ.get("NAS_UPLOAD_CONCURRENCY", "2"))),
+            thread_name_prefix="nas-upload",
+        )
 
         key_dir = Path("/opt/box/.ssh")
         key_dir.mkdir(parents=True, exist_ok=True)
@@ -45,21 +130,35 @@ class NASManager:
     # ---------- Config ----------
     def _load_config(self) -> Optional[NASConfig]:
         try:
+            mtime = self.config_path.stat().st_mtime_ns
+            cached = self._cfg_cache
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
             raw = self.config_path.read_text(encoding="utf-8")
             data = json.loads(raw)
-            return NASConfig(**data)
+            cfg = NASConfig(**data)
+            self._cfg_cache = (mtime, cfg, SshProfile.from_config(cfg))
+            return cfg
         except FileNotFoundError:
+            self._cfg_cache = None
             return None
         except Exception as exc:
             self.log.warning("Failed to load NAS config: %s", exc)
             return None
 
+    def _ssh_profile(self, cfg: NASConfig) -> SshProfile:
+        cached = self._cfg_cache
+        if cached is not None and cached[1] is cfg:
+            return cached[2]
+        return SshProfile.from_config(cfg)
+
     def _write_config(self, cfg: NASConfig) -> None:
         self.config_path.parent.mkdir(parents=True, exist_ok=True)
         tmp = self.config_path.with_suffix(".tmp")
         tmp.write_text(json.dumps(cfg.__dict__, indent=2, sort_keys=True), encoding="utf-8")
         tmp.chmod(0o600)
         tmp.replace(self.config_path)
+        self._cfg_cache = None
 
     # ---------- Setup ----------
     def setup(self, *, host: str, port: int, username: str, password: str,
@@ -74,7 +173,7 @@ class NASManager:
 
         if not key_path.exists():
             # ed25519-Key erzeugen (leer passphrase)
-            self._run(["ssh-keygen", "-t", "ed25519", "-N", "", "-f", str(key_path)], check=True)
+            self._run(["ssh-keygen", "-t", "ed25519", "-N", "", "-f", str(key_path)], check=True, quiet=True)
             key_path.chmod(0o600)
         if not pub_path.exists():
             raise HTTPException(500, "Public key fehlt nach ssh-keygen")
@@ -132,113 +231,164 @@ class NASManager:
     def health(self) -> Dict[str, Any]:
         cfg = self._load_config()
         if not cfg:
-            self._health_state = {"ok": False, "last_checked": _dt.datetime.utcnow().isoformat()+"Z", "message": "not configured"}
+            self._health_state = {"ok": False, "last_checked": utcnow_iso(), "message": "not configured"}
             return dict(self._health_state)
 
         ok, msg = self._probe(cfg)
-        self._health_state = {"ok": bool(ok), "last_checked": _dt.datetime.utcnow().isoformat()+"Z", "message": msg or ""}
+        self._health_state = {"ok": bool(ok), "last_checked": utcnow_iso(), "message": msg or ""}
         return dict(self._health_state)
 
     def _probe(self, cfg: NASConfig) -> tuple[bool, str]:
-        cmd = [
-            "ssh",
-            "-i", cfg.key_path,
-            "-o", "BatchMode=yes",
-            "-o", "StrictHostKeyChecking=no",
-            "-p", str(cfg.port),
-            f"{cfg.username}@{cfg.host}",
-            "true",
-        ]
-        res = self._run(cmd, check=False)
+        cmd = [*self._ssh_profile(cfg).ssh_argv, "true"]
+        res = self._run(cmd, check=False, quiet=True, timeout=PROBE_TIMEOUT_S)
         if res.returncode == 0:
             return True, "ok"
-        return False, f"ssh probe failed (rc={res.returncode})"
+        err = _err_tail(res.stderr)
+        return False, f"ssh probe failed (rc={res.returncode})" + (f": {err}" if err else "")
 
     # ---------- Upload ----------
     def enqueue_upload(self, run_id: str) -> bool:
-        with self._lock:
+        try:
+            run_dir = storage.resolve_run_directory(run_id)
+        except HTTPException:
+            self.log.error("Upload skipped: run_id not found (%s)", run_id)
+            return False
+        # Gruppierung nach Elternordner (<experiment>/<subdir>), damit Runs
+        # einer Serie gemeinsam in einem rsync landen
+        try:
+            group = run_dir.parent.relative_to(self.runs_root).as_posix()
+        except ValueError:
+            group = ""
+        with self._pending_cv:
             if run_id in self._uploading:
                 return False
             self._uploading.add(run_id)
-        t = threading.Thread(target=self._upload_worker, args=(run_id,), daemon=True, name=f"upload-{run_id}")
-        t.start()
+            self._pending.setdefault(group, set()).add(run_id)
+            if self._coalescer is None:
+                self._coalescer = threading.Thread(target=self._coalesce_loop, daemon=True, name="nas-upload-coalesce")
+                self._coalescer.start()
+            self._pending_cv.notify()
         return True
 
-    def _upload_worker(self, run_id: str) -> None:
-        cfg = self._load_config()
-        if not cfg:
-            self.log.warning("Upload skipped: NAS not configured (run_id=%s)", run_id)
-            with self._lock:
-                self._uploading.discard(run_id)
-            return
-
+    def _coalesce_loop(self) -> None:
+        while True:
+            with self._pending_cv:
+                while not self._pending:
+                    self._pending_cv.wait()
+            # Kurz weitere Runs derselben Gruppe einsammeln
+            time.sleep(UPLOAD_COALESCE_S)
+            with self._pending_cv:
+                batches, self._pending = self._pending, {}
+            for run_ids in batches.values():
+                self._upload_pool.submit(self._upload_worker, sorted(run_ids))
+
+    def _upload_worker(self, run_ids: list[str]) -> None:
+        # Laeuft im Pool, dessen Future niemand abfragt: Fehler hier loggen und markieren
         try:
-            run_dir = storage.resolve_run_directory(run_id)
-        except HTTPException:
-            self.log.error("Upload skipped: run_id not found (%s)", run_id)
+            self._upload_batch(run_ids)
+        except Exception as exc:
+            self.log.exception("Upload worker crashed (run_ids=%s)", ",".join(run_ids))
+            for run_id in run_ids:
+                try:
+                    self._mark_failed(storage.resolve_run_directory(run_id), f"upload error: {exc}")
+                except Exception:
+                    pass
+        finally:
             with self._lock:
-                self._uploading.discard(run_id)
+                self._uploading.difference_update(run_ids)
+
+    def _upload_batch(self, run_ids: list[str]) -> None:
+        cfg = self._load_config()
+        if not cfg:
+            self.log.warning("Upload skipped: NAS not configured (run_ids=%s)", ",".join(run_ids))
             return
+        profile = self._ssh_profile(cfg)
 
         # Zielstruktur: <remote_base_dir>/<relative_to_runs_root>
-        try:
-            rel = run_dir.relative_to(self.runs_root).as_posix()
-        except Exception:
-            # Fallback: in einen Unterordner nach run_id
-            rel = run_id
-
-        dest = f"{cfg.remote_base_dir.rstrip('/')}/{rel}"
-        ok, msg = self._mkdir_remote(cfg, dest)
-        if not ok:
-            self._mark_failed(run_dir, reason=f"mkdir remote failed: {msg}")
-            with self._lock:
-                self._uploading.discard(run_id)
+        run_dirs: Dict[str, Path] = {}
+        hashes: Dict[str, str] = {}
+        for run_id in run_ids:
+            try:
+                run_dir = storage.resolve_run_directory(run_id)
+            except HTTPException:
+                self.log.error("Upload skipped: run_id not found (%s)", run_id)
+                continue
+            # Unveränderte, bereits hochgeladene Runs gar nicht erst an rsync geben
+            digest = _content_hash(run_dir)
+            if self._is_uploaded(run_dir, digest):
+                self.log.info("Upload skipped, unchanged (run_id=%s)", run_id)
+                continue
+            try:
+                rel = run_dir.relative_to(self.runs_root).as_posix()
+            except ValueError:
+                # Ausserhalb von runs_root: einzeln in einen Unterordner nach run_id
+                self._upload_one(profile, run_id, run_dir, run_id, digest)
+                continue
+            run_dirs[rel] = run_dir
+            hashes[rel] = digest
+        if not run_dirs:
             return
 
-        # rsync Upload (idempotent)
-        ssh_cmd = f"ssh -i {shlex.quote(cfg.key_path)} -o BatchMode=yes -o StrictHostKeyChecking=no -p {cfg.port}"
-        rsync_cmd = [
-            "rsync", "-a", "--partial", "--append-verify",
-            "-e", ssh_cmd,
-            str(run_dir) + "/",  # trailing slash = Inhalt kopieren
-            f"{cfg.username}@{cfg.host}:{dest}/",
+        # Ein rsync fuer alle Runs der Gruppe: Pfade relativ zu runs_root per
+        # --files-from (impliziert --relative; -r wird dann nicht von -a gesetzt)
+        rels = sorted(run_dirs)
+        res = self._run(self._rsync_cmd(profile, "-r", "--files-from=-", str(self.runs_root) + "/",
+                                        profile.remote_base + "/"),
+                        check=False, input="\n".join(rels) + "\n")
+        dirs = [run_dirs[rel] for rel in rels]
+        if self._verify_upload(dirs, res, [hashes[rel] for rel in rels]):
+            for rel in rels:
+                self.log.info("Upload OK dir=%s dest=%s/%s", run_dirs[rel], profile.remote_base, rel)
+
+    def _upload_one(self, profile: SshProfile, run_id: str, run_dir: Path, rel: str, digest: str) -> None:
+        dest = f"{profile.remote_base}/{rel}"
+        # trailing slash = Inhalt kopieren
+        res = self._run(self._rsync_cmd(profile, str(run_dir) + "/", dest + "/"), check=False)
+        if self._verify_upload([run_dir], res, [digest]):
+            self.log.info("Upload OK run_id=%s dest=%s", run_id, dest)
+
+    @staticmethod
+    def _rsync_cmd(profile: SshProfile, *args: str) -> list[str]:
+        # rsync Upload (idempotent); --mkpath legt das Ziel an (rsync >= 3.2.3),
+        # --stats liefert die Zahlen fuer die Verifikation ohne extra SSH-Runde
+        *sources, dest = args
+        return [
+            "rsync", "-a", "--partial", "--append-verify", "--mkpath", "--stats",
+            "-e", profile.rsync_e,
+            *sources,
+            profile.rsync_target + dest,
         ]
-        res = self._run(rsync_cmd, check=False)
+
+    @staticmethod
+    def _is_uploaded(run_dir: Path, digest: str) -> bool:
+        if not (run_dir / "UPLOAD_DONE").exists():
+            return False
+        try:
+            return (run_dir / UPLOAD_HASH_NAME).read_text(encoding="utf-8").strip() == digest
+        except OSError:
+            return False
+
+    def _verify_upload(self, run_dirs: list[Path], res: subprocess.CompletedProcess, hashes: list[str]) -> bool:
         if res.returncode != 0:
-            self._mark_failed(run_dir, reason=f"rsync rc={res.returncode}")
-        else:
-            # Kleinste Verifikation: Anzahl Dateien vergleichen
-            local_count = sum(1 for p in run_dir.rglob("*") if p.is_file())
-            remote_cnt_cmd = [
-                "ssh", "-i", cfg.key_path, "-o", "BatchMode=yes", "-o", "StrictHostKeyChecking=no", "-p", str(cfg.port),
-                f"{cfg.username}@{cfg.host}", "bash", "-lc", f"find {shlex.quote(dest)} -type f | wc -l",
-            ]
-            cnt = self._run(remote_cnt_cmd, check=False)
-            if cnt.returncode == 0:
-                try:
-                    remote_count = int((cnt.stdout or "").strip())
-                except Exception:
-                    remote_count = -1
-            else:
-                remote_count = -1
-
-            if remote_count >= 0 and remote_count < local_count:
-                self._mark_failed(run_dir, reason=f"verify mismatch local={local_count} remote={remote_count}")
-            else:
-                (run_dir / "UPLOAD_DONE").write_text(_dt.datetime.utcnow().isoformat()+"Z", encoding="utf-8")
-                self.log.info("Upload OK run_id=%s dest=%s", run_id, dest)
-
-        with self._lock:
-            self._uploading.discard(run_id)
-
-    def _mkdir_remote(self, cfg: NASConfig, dest: str) -> tuple[bool, str]:
-        cmd = [
-            "ssh", "-i", cfg.key_path, "-o", "BatchMode=yes", "-o", "StrictHostKeyChecking=no", "-p", str(cfg.port),
-            f"{cfg.username}@{cfg.host}",
-            "mkdir", "-p", dest,
-        ]
-        res = self._run(cmd, check=False)
-        return (res.returncode == 0, f"rc={res.returncode}")
+            for run_dir in run_dirs:
+                self._mark_failed(run_dir, reason=f"rsync rc={res.returncode}")
+            return False
+
+        # Kleinste Verifikation: von rsync gemeldete Dateizahl (rc==0 => uebertragen
+        # oder bereits vorhanden) mit lokaler vergleichen; ohne Stats zaehlt nur rc
+        local_count = sum(storage.count_files(run_dir) for run_dir in run_dirs)
+        stats = parse_rsync_stats(res.stdout or "")
+        synced_count = synced_file_count(stats)
+
+        if synced_count is not None and synced_count < local_count:
+            for run_dir in run_dirs:
+                self._mark_failed(run_dir, reason=f"verify mismatch local={local_count} synced={synced_count}")
+            return False
+        stamp = utcnow_iso()
+        for run_dir, digest in zip(run_dirs, hashes):
+            (run_dir / UPLOAD_HASH_NAME).write_text(digest, encoding="utf-8")
+            (run_dir / "UPLOAD_DONE").write_text(stamp, encoding="utf-8")
+        return True
 
     def _mark_failed(self, run_dir: Path, reason: str) -> None:
         self.log.warning("Upload FAILED dir=%s reason=%s", run_dir, reason)
@@ -257,7 +407,7 @@ class NASManager:
             return
         for _ in range(3):
             ok, msg = self._probe(cfg)
-            self._health_state = {"ok": bool(ok), "last_checked": _dt.datetime.utcnow().isoformat()+"Z", "message": msg or ""}
+            self._health_state = {"ok": bool(ok), "last_checked": utcnow_iso(), "message": msg or ""}
             if ok:
                 break
             time.sleep(5)
@@ -273,26 +423,98 @@ class NASManager:
             time.sleep(6 * 3600)  # alle 6 Stunden
 
     def _apply_retention(self, cfg: NASConfig) -> None:
-        cutoff = _dt.datetime.utcnow() - _dt.timedelta(days=cfg.retention_days)
-        for path in self.runs_root.rglob("*"):
-            if not path.is_dir():
-                continue
-            # Nur Run-Verzeichnisse mit Upload-Marker
-            marker = path / "UPLOAD_DONE"
-            if not marker.exists():
-                continue
+        cutoff = time.time() - cfg.retention_days * 86400
+        # Nur Verzeichnisse ablaufen; unterhalb eines Run-Verzeichnisses
+        # (mit Upload-Marker) wird nicht weiter abgestiegen.
+        stack = [str(self.runs_root)]
+        while stack:
             try:
-                ts = _dt.datetime.utcfromtimestamp(marker.stat().st_mtime)
-            except Exception:
-                ts = _dt.datetime.utcfromtimestamp(path.stat().st_mtime)
-            if ts <= cutoff:
-                try:
-                    shutil.rmtree(path)
-                    self.log.info("Local retention delete: %s", path)
-                except Exception as exc:
-                    self.log.warning("Failed to remove %s: %s", path, exc)
+                it = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    marker = os.path.join(entry.path, "UPLOAD_DONE")
+                    try:
+                        ts = os.stat(marker).st_mtime
+                    except FileNotFoundError:
+                        stack.append(entry.path)
+                        continue
+                    except OSError:
+                        ts = entry.stat(follow_symlinks=False).st_mtime
+                    if ts <= cutoff:
+                        path = Path(entry.path)
+                        try:
+                            storage.remove_tree(path)
+                            self.log.info("Local retention delete: %s", path)
+                        except Exception as exc:
+                            self.log.warning("Failed to remove %s: %s", path, exc)
 
     # ---------- Utils ----------
-    def _run(self, cmd: list[str], check: bool = False) -> subprocess.CompletedProcess:
+    def _run(self, cmd: list[str], check: bool = False, *, quiet: bool = False,
+             timeout: Optional[float] = None, input: Optional[str] = None) -> subprocess.CompletedProcess:
+        """
+        quiet=True: kurze Kommandos (Probe, ssh-keygen), Ausgabe komplett puffern;
+        bei rc != 0 landet das Ende von stderr im Log.
+        Sonst (rsync): Ausgabe zeilenweise streamen und nur die letzten
+        RUN_TAIL_LINES Zeilen je Stream behalten, statt alles im RAM zu puffern.
+        timeout gilt in beiden Faellen; bei Ablauf wird die Prozessgruppe beendet.
+        """
         self.log.debug("RUN %s", " ".join(shlex.quote(c) for c in cmd))
-        return subprocess.run(cmd, text=True, capture_output=True, check=check)
+        if quiet:
+            try:
+                res = subprocess.run(
+                    cmd, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                    check=False, timeout=timeout, input=input, start_new_session=True,
+                )
+            except subprocess.TimeoutExpired:
+                self.log.warning("Command timed out after %ss: %s", timeout, cmd[0])
+                if check:
+                    raise
+                return subprocess.CompletedProcess(cmd, -1, "", "timeout")
+            if res.returncode != 0:
+                self.log.warning("Command failed rc=%s: %s: %s", res.returncode, cmd[0], _err_tail(res.stderr))
+            if check:
+                res.check_returncode()
+            return res
+
+        proc = subprocess.Popen(
+            cmd, text=True, start_new_session=True,
+            stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        # Beide Streams in Reader-Threads leeren, damit wait(timeout) auch bei
+        # haengendem rsync/ssh greift (ein Lesen bis EOF hier wuerde ewig blockieren)
+        out_tail: deque[str] = deque(maxlen=RUN_TAIL_LINES)
+        err_tail: deque[str] = deque(maxlen=RUN_TAIL_LINES)
+        readers = [
+            threading.Thread(target=tail.extend, args=(stream,), daemon=True)
+            for tail, stream in ((out_tail, proc.stdout), (err_tail, proc.stderr))
+        ]
+        for reader in readers:
+            reader.start()
+        if input is not None:
+            try:
+                proc.stdin.write(input)
+            except BrokenPipeError:
+                pass
+            finally:
+                proc.stdin.close()
+        try:
+            rc = proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.log.warning("Command timed out after %ss: %s", timeout, cmd[0])
+            # ganze Session beenden: rsync startet ssh als Kind, das die Pipes offen hielte
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except (AttributeError, OSError):  # kein killpg (Windows) oder Gruppe schon weg
+                proc.kill()
+            rc = proc.wait()
+        for reader in readers:
+            reader.join()
+        res = subprocess.CompletedProcess(cmd, rc, "".join(out_tail), "".join(err_tail))
+        if check:
+            res.check_returncode()
+        return res
@@ -0,0 +1,49 @@
+# /opt/box/nas_common.py
+"""Gemeinsame Helfer fuer nas.py (SSH/rsync) und nas_smb.py (CIFS/rsync)."""
+from __future__ import annotations
+import re
+from typing import Dict, Optional
+
+# rsync --stats: betrachtete Quell-Eintraege (inkl. bereits vorhandener), ab rsync 3.1
+# mit Tausendertrennern und Aufschluesselung "(reg: N, dir: M, ...)"
+RSYNC_FILES_RE = re.compile(r"^Number of files: ([\d,.]+)(?: \((.*)\))?", re.MULTILINE)
+RSYNC_REG_RE = re.compile(r"\breg: ([\d,.]+)")
+RSYNC_LINK_RE = re.compile(r"\blink: ([\d,.]+)")
+RSYNC_TRANSFERRED_RE = re.compile(r"^Number of (?:regular )?files transferred: ([\d,.]+)", re.MULTILINE)
+
+
+def _parse_rsync_count(raw: str) -> int:
+    return int(raw.replace(",", "").replace(".", ""))
+
+
+def parse_rsync_stats(stdout: str) -> Dict[str, int]:
+    """
+    Zahlen aus der rsync --stats Ausgabe: files (alle Eintraege), reg/link (nur
+    regulaere Dateien bzw. Symlinks, falls aufgeschluesselt), transferred.
+    Fehlende Werte fehlen im Dict.
+    """
+    stats: Dict[str, int] = {}
+    match = RSYNC_FILES_RE.search(stdout)
+    if match:
+        stats["files"] = _parse_rsync_count(match.group(1))
+        detail = match.group(2) or ""
+        reg = RSYNC_REG_RE.search(detail)
+        if reg:
+            stats["reg"] = _parse_rsync_count(reg.group(1))
+            link = RSYNC_LINK_RE.search(detail)
+            stats["link"] = _parse_rsync_count(link.group(1)) if link else 0
+    match = RSYNC_TRANSFERRED_RE.search(stdout)
+    if match:
+        stats["transferred"] = _parse_rsync_count(match.group(1))
+    return stats
+
+
+def synced_file_count(stats: Dict[str, int]) -> Optional[int]:
+    """
+    Mit storage.count_files vergleichbare Zahl aus parse_rsync_stats: rsync -a
+    uebertraegt Datei-Symlinks als Links (link:, nicht reg:), count_files zaehlt
+    sie mit. Ohne Aufschluesselung nur files (inkl. Verzeichnisse), sonst None.
+    """
+    if "reg" in stats:
+        return stats["reg"] + stats.get("link", 0)
+    return stats.get("files")
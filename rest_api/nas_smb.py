@@ -1,7 +1,7 @@
 # /opt/box/nas_smb.py
 from __future__ import annotations
-import datetime as _dt
 import json, logging, os, shlex, shutil, subprocess, threading, time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, Optional
@@ -9,6 +9,21 @@ from typing import Any, Dict, Optional
 from fastapi import HTTPException
 
 import storage  # benutzt resolve_run_directory & RUNS_ROOT-Spiegelung
+from nas_common import parse_rsync_stats, synced_file_count
+from progress_utils import utcnow_iso
+
+try:
+    import smbclient  # type: ignore  # aus smbprotocol
+except ImportError:  # pragma: no cover - optional, nativer SMB-Upload ohne CIFS-Mount
+    smbclient = None  # type: ignore
+
+# Parallel laufende Run-Uploads (jeweils eigener rsync bzw. eigene Datei-Worker)
+SMB_UPLOAD_CONCURRENCY = max(1, int(os.environ.get("SMB_UPLOAD_CONCURRENCY", "4")))
+# Parallel offene Datei-Uploads ueber eine SMB-Session (RTT wird ueber Dateien amortisiert)
+SMB_MAX_INFLIGHT = max(1, int(os.environ.get("SMB_UPLOAD_INFLIGHT", "16")))
+SMB_COPY_CHUNK = 1024 * 1024
+# CIFS-Mount nach der letzten Nutzung noch so lange halten (Folge-Uploads teilen ihn)
+MOUNT_GRACE_S = 60.0
 
 
 @dataclass
@@ -22,6 +37,7 @@ class SMBConfig:
     retention_days: int = 14
     cifs_vers: str = "3.0"   # SMB3
     domain: Optional[str] = None
+    max_channels: int = 1    # SMB3 Multichannel, opt-in (1 = aus)
 
 
 class NASManager:
@@ -29,7 +45,8 @@ class NASManager:
     KISS-SMB-Manager:
       - setup(): Credentials schreiben, Mount prüfen, Basisordner anlegen
       - health(): Probe-Mount durchführen
-      - enqueue_upload(): Upload-Worker per rsync in gemountetes Ziel
+      - enqueue_upload(): Upload-Worker nativ per smbprotocol (falls installiert),
+        sonst per rsync in gemountetes Ziel
       - start_background(): Health-Probe + Retention-Loop
     """
 
@@ -40,16 +57,34 @@ class NASManager:
         self._upl_lock = threading.Lock()
         self._mnt_lock = threading.Lock()
         self._uploading: set[str] = set()
+        # Begrenzter Pool: mehrere Runs parallel, ohne einen Thread pro Run
+        self._upload_pool = ThreadPoolExecutor(max_workers=SMB_UPLOAD_CONCURRENCY, thread_name_prefix="smb-upload")
         self._health_state: Dict[str, Any] = {"ok": False, "last_checked": None, "message": "not checked"}
+        # (host, username, cred mtime) der registrierten smbclient-Session
+        self._smb_session_key: Optional[tuple[str, str, int]] = None
+        # (st_mtime_ns, config) der zuletzt geparsten Konfigurationsdatei
+        self._cfg_cache: Optional[tuple[int, SMBConfig]] = None
+        # CIFS-Mounts (Fallback ohne smbprotocol), referenzgezaehlt: "health" (ro) und "share" (rw)
+        self._mount_refcount: Dict[str, int] = {}
+        # (unc, cred_path, cred mtime, cifs_vers) je Mountpunkt: neue Credentials -> neu mounten
+        self._mount_keys: Dict[str, tuple[str, str, int, str]] = {}
+        self._umount_timers: Dict[str, threading.Timer] = {}
         Path("/opt/box").mkdir(parents=True, exist_ok=True)
         Path("/mnt/nas_box").mkdir(parents=True, exist_ok=True)
 
     # ---------- Config ----------
     def _load_config(self) -> Optional[SMBConfig]:
         try:
+            mtime = os.stat(self.config_path).st_mtime_ns
+            cached = self._cfg_cache
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
             data = json.loads(self.config_path.read_text(encoding="utf-8"))
-            return SMBConfig(**data)
+            cfg = SMBConfig(**data)
+            self._cfg_cache = (mtime, cfg)
+            return cfg
         except FileNotFoundError:
+            self._cfg_cache = None
             return None
         except Exception as exc:
             self.log.warning("Failed to load SMB config: %s", exc)
@@ -61,6 +96,7 @@ class NASManager:
         tmp.write_text(json.dumps(cfg.__dict__, indent=2, sort_keys=True), encoding="utf-8")
         tmp.chmod(0o600)
         tmp.replace(self.config_path)
+        self._cfg_cache = (os.stat(self.config_path).st_mtime_ns, cfg)
 
     def _write_credentials(self, path: Path, username: str, password: str, domain: Optional[str]) -> None:
         lines = [f"username={username}", f"password={password}"]
@@ -72,7 +108,8 @@ class NASManager:
 
     # ---------- Setup ----------
     def setup(self, *, host: str, share: str, username: str, password: str,
-              base_subdir: str = "", retention_days: int = 14, domain: Optional[str] = None) -> Dict[str, Any]:
+              base_subdir: str = "", retention_days: int = 14, domain: Optional[str] = None,
+              max_channels: int = 1) -> Dict[str, Any]:
         if not (host and share and username and password):
             raise HTTPException(400, "host/share/username/password erforderlich")
         cred_path = Path("/opt/box/.smbcredentials_nas")
@@ -88,6 +125,7 @@ class NASManager:
             retention_days=int(retention_days or 14),
             cifs_vers="3.0",
             domain=domain or None,
+            max_channels=max(1, int(max_channels or 1)),
         )
         self._write_config(cfg)
 
@@ -105,9 +143,15 @@ class NASManager:
         return dict(self._health_state)
 
     def _probe(self, cfg: SMBConfig, *, ensure_base: bool) -> tuple[bool, str]:
-        mnt = Path(cfg.mount_root) / "health"
+        if smbclient is not None:
+            return self._probe_native(cfg, ensure_base=ensure_base)
+        try:
+            # Routine-Health-Checks laufen ueber einen read-only Mount; nur setup()
+            # braucht Schreibzugriff, um das Basisverzeichnis anzulegen
+            mnt = self._acquire_mount(cfg, read_only=not ensure_base)
+        except Exception as exc:
+            return False, f"probe error: {exc}"
         try:
-            self._mount(cfg, mnt, read_only=True)
             base_path = self._dest_base_path(cfg, mnt)
             if ensure_base:
                 base_path.mkdir(parents=True, exist_ok=True)
@@ -116,21 +160,30 @@ class NASManager:
         except Exception as exc:
             return False, f"probe error: {exc}"
         finally:
-            try:
-                self._umount(mnt)
-            except Exception:
-                pass
+            self._release_mount(mnt)
 
     # ---------- Upload ----------
     def enqueue_upload(self, run_id: str) -> bool:
+        # Nur einreihen; Config-/Mount-Arbeit erledigt der Upload-Pool
         with self._upl_lock:
             if run_id in self._uploading:
                 return False
             self._uploading.add(run_id)
-        t = threading.Thread(target=self._upload_worker, args=(run_id,), daemon=True, name=f"smb-upload-{run_id}")
-        t.start()
+        self._upload_pool.submit(self._upload_task, run_id)
         return True
 
+    def _upload_task(self, run_id: str) -> None:
+        try:
+            self._upload_worker(run_id)
+        except Exception as exc:
+            self.log.exception("Upload worker crashed (run_id=%s)", run_id)
+            try:
+                self._mark_failed(storage.resolve_run_directory(run_id), f"upload error: {exc}")
+            except Exception:
+                pass
+            with self._upl_lock:
+                self._uploading.discard(run_id)
+
     def _upload_worker(self, run_id: str) -> None:
         cfg = self._load_config()
         if not cfg:
@@ -147,10 +200,19 @@ class NASManager:
                 self._uploading.discard(run_id)
             return
 
-        mnt = Path(cfg.mount_root) / "upload"
-        dest_base = None
+        if smbclient is not None:
+            try:
+                self._upload_native(cfg, run_id, run_dir)
+            except Exception as exc:
+                self._mark_failed(run_dir, f"upload error: {exc}")
+            finally:
+                with self._upl_lock:
+                    self._uploading.discard(run_id)
+            return
+
+        mnt: Optional[Path] = None
         try:
-            self._mount(cfg, mnt, read_only=False)
+            mnt = self._acquire_mount(cfg)
             dest_base = self._dest_base_path(cfg, mnt)
 
             # Ziel: <base>/<relativ_zu_RUNS_ROOT>
@@ -161,18 +223,25 @@ class NASManager:
             dest = dest_base / rel
             dest.mkdir(parents=True, exist_ok=True)
 
-            # rsync innerhalb des Dateisystems (lokal -> CIFS-Mount)
+            # rsync innerhalb des Dateisystems (lokal -> CIFS-Mount); --stats
+            # liefert die Dateizahl, ohne das Ziel ueber CIFS erneut abzulaufen
             rsync_cmd = [
-                "rsync", "-a", "--partial",
+                "rsync", "-a", "--partial", "--stats",
                 str(run_dir) + "/", str(dest) + "/",
             ]
             res = self._run(rsync_cmd, check=False)
             if res.returncode != 0:
                 self._mark_failed(run_dir, f"rsync rc={res.returncode}, err={res.stderr.strip() if res.stderr else ''}")
             else:
-                # minimale Verifikation: Dateizahl vergleichen
-                local_count = sum(1 for p in run_dir.rglob("*") if p.is_file())
-                remote_count = sum(1 for p in dest.rglob("*") if p.is_file())
+                # minimale Verifikation: von rsync gemeldete Dateizahl mit lokaler vergleichen
+                local_count = storage.count_files(run_dir)
+                stats = parse_rsync_stats(res.stdout or "")
+                remote_count = synced_file_count(stats)
+                if remote_count is None:
+                    # Stats nicht lesbar (altes/lokalisiertes rsync): nicht als verifiziert
+                    # werten, sondern das Ziel auf dem Mount nachzaehlen
+                    self.log.warning("rsync --stats not parseable (run_id=%s); counting files at %s", run_id, dest)
+                    remote_count = storage.count_files(dest)
                 if remote_count < local_count:
                     self._mark_failed(run_dir, f"verify mismatch local={local_count} remote={remote_count}")
                 else:
@@ -181,13 +250,103 @@ class NASManager:
         except Exception as exc:
             self._mark_failed(run_dir, f"upload error: {exc}")
         finally:
-            try:
-                self._umount(mnt)
-            except Exception as exc:
-                self.log.warning("umount failed: %s", exc)
+            if mnt is not None:
+                self._release_mount(mnt)
             with self._upl_lock:
                 self._uploading.discard(run_id)
 
+    # ---------- Native SMB (smbprotocol) ----------
+    def _smb_session(self, cfg: SMBConfig) -> None:
+        """Session einmal je Host/Credentials registrieren; smbclient haelt die Verbindung im Pool."""
+        cred_mtime = os.stat(cfg.cred_path).st_mtime_ns
+        key = (cfg.host, cfg.username, cred_mtime)
+        with self._mnt_lock:
+            if self._smb_session_key == key:
+                return
+            creds = self._read_credentials(Path(cfg.cred_path))
+            username = creds.get("username", cfg.username)
+            domain = creds.get("domain") or cfg.domain
+            if domain:
+                username = f"{domain}\\{username}"
+            smbclient.register_session(cfg.host, username=username, password=creds.get("password"))
+            self._smb_session_key = key
+
+    def _smb_path(self, cfg: SMBConfig, rel: str = "") -> str:
+        parts = [cfg.host.strip("/\\"), cfg.share.strip("/\\")]
+        for chunk in (cfg.base_subdir, rel):
+            chunk = (chunk or "").strip("/")
+            if chunk:
+                parts.append(chunk.replace("/", "\\"))
+        return "\\\\" + "\\".join(parts)
+
+    def _probe_native(self, cfg: SMBConfig, *, ensure_base: bool) -> tuple[bool, str]:
+        base = self._smb_path(cfg)
+        try:
+            self._smb_session(cfg)
+            if ensure_base:
+                smbclient.makedirs(base, exist_ok=True)
+            smbclient.stat(base)
+            return True, "ok"
+        except FileNotFoundError:
+            return False, f"base path not present: {base}"
+        except Exception as exc:
+            return False, f"probe error: {exc}"
+
+    def _upload_native(self, cfg: SMBConfig, run_id: str, run_dir: Path) -> None:
+        self._smb_session(cfg)
+        try:
+            rel = run_dir.relative_to(self.runs_root).as_posix()
+        except Exception:
+            rel = run_id
+        dest = self._smb_path(cfg, rel)
+
+        # Dateiliste einmal erfassen; Zielordner je Verzeichnis nur einmal anlegen
+        prefix = str(run_dir) + os.sep
+        files = [(entry.path, entry.path[len(prefix):].replace(os.sep, "\\")) for entry in storage.iter_files(run_dir)]
+        made: set[str] = set()
+        for _, rel_file in files:
+            parent = rel_file.rpartition("\\")[0]
+            if parent not in made:
+                smbclient.makedirs(dest + ("\\" + parent if parent else ""), exist_ok=True)
+                made.add(parent)
+
+        def _copy(item: tuple[str, str]) -> bool:
+            src_path, rel_file = item
+            remote = dest + "\\" + rel_file
+            with open(src_path, "rb") as src, smbclient.open_file(remote, mode="wb") as dst:
+                local_size = os.fstat(src.fileno()).st_size
+                shutil.copyfileobj(src, dst, SMB_COPY_CHUNK)
+            # Verifikation gegen das Ziel: Groesse der Remote-Datei muss passen
+            return smbclient.stat(remote).st_size == local_size
+
+        # Mehrere Dateien gleichzeitig in Flight ueber dieselbe SMB-Verbindung
+        with ThreadPoolExecutor(max_workers=SMB_MAX_INFLIGHT, thread_name_prefix="smb-put") as pool:
+            verified = sum(pool.map(_copy, files))
+
+        # minimale Verifikation: alle lokal erfassten Dateien remote mit gleicher Groesse
+        local_count = storage.count_files(run_dir)
+        if verified < local_count:
+            self._mark_failed(run_dir, f"verify mismatch local={local_count} remote={verified}")
+        else:
+            (run_dir / "UPLOAD_DONE").write_text(self._now(), encoding="utf-8")
+            self.log.info("SMB Upload OK run_id=%s dest=%s", run_id, dest)
+
+    def _mark_failed(self, run_dir: Path, reason: str) -> None:
+        self.log.warning("Upload FAILED dir=%s reason=%s", run_dir, reason)
+        try:
+            (run_dir / "upload_failed").write_text(reason, encoding="utf-8")
+        except OSError as exc:
+            self.log.warning("Failed to write upload_failed marker in %s: %s", run_dir, exc)
+
+    @staticmethod
+    def _read_credentials(path: Path) -> Dict[str, str]:
+        creds: Dict[str, str] = {}
+        for line in path.read_text(encoding="utf-8").splitlines():
+            key, sep, value = line.partition("=")
+            if sep:
+                creds[key.strip()] = value.strip()
+        return creds
+
     # ---------- Retention & Background ----------
     def start_background(self) -> None:
         threading.Thread(target=self._initial_health, daemon=True, name="smb-health-probe").start()
@@ -215,24 +374,41 @@ class NASManager:
             time.sleep(6 * 3600)
 
     def _apply_retention(self, cfg: SMBConfig) -> None:
-        cutoff = _dt.datetime.utcnow() - _dt.timedelta(days=cfg.retention_days)
-        for path in self.runs_root.rglob("*"):
-            if not path.is_dir():
-                continue
-            marker = path / "UPLOAD_DONE"
-            if not marker.exists():
-                continue
-            try:
-                ts = _dt.datetime.utcfromtimestamp(marker.stat().st_mtime)
-            except Exception:
-                ts = _dt.datetime.utcfromtimestamp(path.stat().st_mtime)
+        cutoff = time.time() - cfg.retention_days * 86400
+        for run_path, ts in self._walk_uploaded_runs(str(self.runs_root)):
             if ts <= cutoff:
+                path = Path(run_path)
                 try:
-                    shutil.rmtree(path)
+                    storage.remove_tree(path)
                     self.log.info("Local retention delete: %s", path)
                 except Exception as exc:
                     self.log.warning("Failed to remove %s: %s", path, exc)
 
+    @staticmethod
+    def _walk_uploaded_runs(root: str):
+        """
+        Liefert (pfad, marker-mtime) fuer Verzeichnisse mit UPLOAD_DONE. Nur
+        Verzeichnisse werden abgelaufen; unter einem Run wird nicht weiter abgestiegen.
+        """
+        stack = [root]
+        while stack:
+            try:
+                it = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    try:
+                        ts = os.stat(os.path.join(entry.path, "UPLOAD_DONE")).st_mtime
+                    except FileNotFoundError:
+                        stack.append(entry.path)
+                        continue
+                    except OSError:
+                        ts = entry.stat(follow_symlinks=False).st_mtime
+                    yield entry.path, ts
+
     # ---------- Mount helpers ----------
     def _unc(self, cfg: SMBConfig) -> str:
         return f"//{cfg.host.strip('/')}/{cfg.share.strip('/')}"
@@ -240,7 +416,70 @@ class NASManager:
     def _dest_base_path(self, cfg: SMBConfig, mount_point: Path) -> Path:
         return mount_point / (cfg.base_subdir.strip("/") if cfg.base_subdir else "")
 
-    def _mount(self, cfg: SMBConfig, mount_point: Path, *, read_only: bool) -> None:
+    def _acquire_mount(self, cfg: SMBConfig, *, read_only: bool = False) -> Path:
+        """
+        Gemeinsamen Mount holen: read_only -> <mount_root>/health (Probes), sonst
+        <mount_root>/share (Uploads, setup). Gemountet wird nur beim Uebergang
+        0 -> 1 (oder wenn sich Share/Credentials geaendert haben).
+        """
+        mount_point = Path(cfg.mount_root) / ("health" if read_only else "share")
+        name = str(mount_point)
+        # setup() schreibt immer dieselbe Datei: erst die mtime macht neue Credentials sichtbar
+        key = (self._unc(cfg), cfg.cred_path, os.stat(cfg.cred_path).st_mtime_ns, cfg.cifs_vers)
+        with self._mnt_lock:
+            timer = self._umount_timers.pop(name, None)
+            if timer is not None:
+                timer.cancel()
+            refs = self._mount_refcount.get(name, 0)
+            stale = self._mount_keys.get(name) != key
+            if refs == 0 and (stale or not mount_point.is_mount()):
+                self._mount(cfg, mount_point, read_only=read_only)
+                self._mount_keys[name] = key
+            self._mount_refcount[name] = refs + 1
+        return mount_point
+
+    def _release_mount(self, mount_point: Path) -> None:
+        name = str(mount_point)
+        with self._mnt_lock:
+            refs = self._mount_refcount.get(name, 0) - 1
+            self._mount_refcount[name] = max(refs, 0)
+            if refs > 0:
+                return
+            # Nicht sofort aushaengen: schnelle Folge-Operationen nutzen den Mount weiter
+            timer = threading.Timer(MOUNT_GRACE_S, self._umount_idle, args=(mount_point,))
+            timer.daemon = True
+            self._umount_timers[name] = timer
+            timer.start()
+
+    def _umount_idle(self, mount_point: Path) -> None:
+        name = str(mount_point)
+        with self._mnt_lock:
+            if self._mount_refcount.get(name, 0) > 0:
+                return
+            self._umount_timers.pop(name, None)
+            self._mount_keys.pop(name, None)
+            try:
+                self._umount(mount_point)
+            except Exception as exc:
+                self.log.warning("umount failed: %s", exc)
+
+    def shutdown(self) -> None:
+        """Beim Beenden: Grace-Timer stoppen und ungenutzte Mounts sofort aushaengen."""
+        with self._mnt_lock:
+            timers = list(self._umount_timers.items())
+            self._umount_timers.clear()
+            for name, timer in timers:
+                timer.cancel()
+                if self._mount_refcount.get(name, 0) > 0:
+                    continue
+                self._mount_keys.pop(name, None)
+                try:
+                    self._umount(Path(name))
+                except Exception as exc:
+                    self.log.warning("umount failed: %s", exc)
+
+    def _mount(self, cfg: SMBConfig, mount_point: Path, *, read_only: bool = False) -> None:
+        """mount -t cifs; Aufrufer haelt _mnt_lock."""
         mount_point.mkdir(parents=True, exist_ok=True)
         opts = [
             f"credentials={cfg.cred_path}",
@@ -254,14 +493,25 @@ class NASManager:
         ]
         if read_only:
             opts.append("ro")
-        cmd = ["mount", "-t", "cifs", self._unc(cfg), str(mount_point), "-o", ",".join(opts)]
-        with self._mnt_lock:
-            # Wenn bereits gemountet, erst clean unmounten
-            if mount_point.is_mount():
-                self._umount(mount_point)
-            res = self._run(cmd, check=False)
-            if res.returncode != 0:
-                raise RuntimeError(f"mount failed rc={res.returncode} err={res.stderr.strip() if res.stderr else ''}")
+        multichannel = cfg.max_channels > 1 and cfg.cifs_vers.startswith("3")
+        mc_opts = ["multichannel", f"max_channels={cfg.max_channels}"] if multichannel else []
+        # Wenn bereits gemountet, erst clean unmounten
+        if mount_point.is_mount():
+            self._umount(mount_point)
+        # SMB3 Multichannel (opt-in): parallele Uploads ueber mehrere TCP-Verbindungen
+        res = self._run(self._mount_cmd(cfg, mount_point, opts + mc_opts), check=False)
+        if res.returncode != 0 and multichannel:
+            # Kernel/Server ohne Multichannel-Support: ohne die Optionen erneut versuchen
+            self.log.warning(
+                "CIFS mount with multichannel failed (%s); retrying without",
+                res.stderr.strip() if res.stderr else f"rc={res.returncode}",
+            )
+            res = self._run(self._mount_cmd(cfg, mount_point, opts), check=False)
+        if res.returncode != 0:
+            raise RuntimeError(f"mount failed rc={res.returncode} err={res.stderr.strip() if res.stderr else ''}")
+
+    def _mount_cmd(self, cfg: SMBConfig, mount_point: Path, opts: list[str]) -> list[str]:
+        return ["mount", "-t", "cifs", self._unc(cfg), str(mount_point), "-o", ",".join(opts)]
 
     def _umount(self, mount_point: Path) -> None:
         if mount_point.exists():
@@ -275,4 +525,4 @@ class NASManager:
 
     @staticmethod
     def _now() -> str:
-        return _dt.datetime.utcnow().isoformat() + "Z"
+        return utcnow_iso()
@@ -1,20 +1,60 @@
 from __future__ import annotations
 
 import datetime
+import functools
 import math
+import time
 from datetime import timezone
-from typing import Any, Dict, Iterable, Mapping, Optional
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional
+
+try:
+    import numpy as np  # kommt ohnehin mit pyBEEP
+except ImportError:  # pragma: no cover - reine Python-Schleife als Fallback
+    np = None  # type: ignore
+
+
+# Unterhalb dieser Punktzahl ist die reine Python-Summe schneller als der NumPy-Overhead
+_EIS_VECTORIZE_MIN_POINTS = 32
+
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") -- formatted once per second, swapped atomically
+_ISO_SECOND_CACHE: tuple[int, str] = (-1, "")
+# (epoch second, "YYYYMMDDTHHMMSS") -- same scheme for compact run_id prefixes
+_COMPACT_SECOND_CACHE: tuple[int, str] = (-1, "")
 
 
 def utcnow_iso() -> str:
     """Return the current UTC timestamp in ISO-8601 format with trailing Z."""
-    return datetime.datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    global _ISO_SECOND_CACHE
+    now = time.time()
+    second = int(now)
+    cached_second, prefix = _ISO_SECOND_CACHE
+    if cached_second != second:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        _ISO_SECOND_CACHE = (second, prefix)
+    return f"{prefix}.{int((now - second) * 1_000_000):06d}Z"
+
+
+def utc_compact_ts() -> str:
+    """Return the current UTC second as YYYYMMDDTHHMMSS (used for run_id prefixes)."""
+    global _COMPACT_SECOND_CACHE
+    second = time.time_ns() // 1_000_000_000
+    cached_second, stamp = _COMPACT_SECOND_CACHE
+    if cached_second != second:
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(second))
+        _COMPACT_SECOND_CACHE = (second, stamp)
+    return stamp
 
 
 def parse_iso(ts: Optional[str]) -> Optional[datetime.datetime]:
     """Parse an ISO-8601 timestamp and normalize it to a timezone-aware UTC value."""
     if not ts:
         return None
+    return _parse_iso_cached(ts)
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_iso_cached(ts: str) -> Optional[datetime.datetime]:
+    # Status-Polls parsen immer wieder dieselben started_at-Strings; datetimes sind immutable
     try:
         normalized = ts.replace("Z", "+00:00") if ts.endswith("Z") else ts
         parsed = datetime.datetime.fromisoformat(normalized)
@@ -55,109 +95,126 @@ def _as_positive_int(value: Any) -> Optional[int]:
     return integer
 
 
-def estimate_planned_duration(mode: Optional[str], params: Dict[str, Any]) -> Optional[float]:
-    """Estimate measurement duration in seconds based on mode-specific parameters."""
-    if not mode or not params:
+def _dur_cv(params: Dict[str, Any], setup: float) -> Optional[float]:
+    """CV: total sweep length over scan rate, per cycle."""
+    scan_rate = _as_positive_float(params.get("scan_rate"))
+    cycles = _as_positive_float(params.get("cycles"))
+    start = _as_float(params.get("start"))
+    vertex1 = _as_float(params.get("vertex1"))
+    vertex2 = _as_float(params.get("vertex2"))
+    end = _as_float(params.get("end"))
+    if not (
+        scan_rate
+        and cycles is not None
+        and start is not None
+        and vertex1 is not None
+        and vertex2 is not None
+        and end is not None
+    ):
         return None
-    mode_key = mode.upper()
-    setup = 1.0
-
-    if mode_key == "CV":
-        scan_rate = _as_positive_float(params.get("scan_rate"))
-        cycles = _as_positive_float(params.get("cycles"))
-        start = _as_float(params.get("start"))
-        vertex1 = _as_float(params.get("vertex1"))
-        vertex2 = _as_float(params.get("vertex2"))
-        end = _as_float(params.get("end"))
-        if not (
-            scan_rate
-            and cycles is not None
-            and start is not None
-            and vertex1 is not None
-            and vertex2 is not None
-            and end is not None
-        ):
-            return None
-        sweep = abs(vertex1 - start) + abs(vertex2 - vertex1) + abs(end - vertex2)
-        if sweep <= 0:
-            return None
-        base = (sweep / scan_rate) * max(cycles, 1)
-        return base + setup
-
-    if mode_key in {"CA", "CP", "OCP"}:
-        duration = _as_positive_float(params.get("duration"))
-        if duration is None:
-            return None
-        return duration + setup
-
-    if mode_key == "LSV":
-        start = _as_float(params.get("start"))
-        end = _as_float(params.get("end"))
-        scan_rate = _as_positive_float(params.get("scan_rate"))
-        if start is None or end is None or not scan_rate:
-            return None
-        base = abs(end - start) / scan_rate
-        return base + setup
-
-    if mode_key == "PSTEP":
-        potentials = params.get("potentials")
-        step_duration = _as_positive_float(params.get("step_duration"))
-        if not isinstance(potentials, list) or not step_duration:
-            return None
-        steps = len(potentials)
-        if steps <= 0:
-            return None
-        base = steps * step_duration
-        return base + setup
-
-    if mode_key == "GS":
-        num_steps = _as_positive_int(params.get("num_steps"))
-        step_duration = _as_positive_float(params.get("step_duration"))
-        if not num_steps or not step_duration:
-            return None
-        base = num_steps * step_duration
-        return base + setup
-
-    if mode_key == "GCV":
-        num_steps = _as_positive_int(params.get("num_steps"))
-        step_duration = _as_positive_float(params.get("step_duration"))
-        cycles = _as_positive_int(params.get("cycles"))
-        if not num_steps or not step_duration or not cycles:
-            return None
-        base = num_steps * step_duration * max(cycles, 1)
-        return base + setup
-
-    if mode_key == "STEPSEQ":
-        currents = params.get("currents")
-        step_duration = _as_positive_float(params.get("step_duration"))
-        if not isinstance(currents, list) or not step_duration:
-            return None
-        steps = len(currents)
-        if steps <= 0:
-            return None
-        base = steps * step_duration
-        return base + setup
-
-    if mode_key == "DC":
-        duration = _as_positive_float(params.get("duration_s"))
-        if duration is None:
-            return None
-        return duration + setup
-
-    if mode_key == "EIS":
-        start_freq = _as_positive_float(params.get("start_freq"))
-        end_freq = _as_positive_float(params.get("end_freq"))
-        points_per_decade = _as_positive_float(params.get("points_per_decade"))
-        cycles_per_freq = _as_positive_float(params.get("cycles_per_freq")) or 3.0
-        if not start_freq or not end_freq or not points_per_decade or not cycles_per_freq:
-            return None
-        spacing = str(params.get("spacing") or "log").strip().lower()
-
-        if math.isclose(start_freq, end_freq, rel_tol=1e-9):
-            freqs = [start_freq]
+    sweep = abs(vertex1 - start) + abs(vertex2 - vertex1) + abs(end - vertex2)
+    if sweep <= 0:
+        return None
+    base = (sweep / scan_rate) * max(cycles, 1)
+    return base + setup
+
+
+def _dur_chrono(params: Dict[str, Any], setup: float) -> Optional[float]:
+    """CA/CP/OCP: fixed measurement duration."""
+    duration = _as_positive_float(params.get("duration"))
+    if duration is None:
+        return None
+    return duration + setup
+
+
+def _dur_lsv(params: Dict[str, Any], setup: float) -> Optional[float]:
+    """LSV: single sweep from start to end."""
+    start = _as_float(params.get("start"))
+    end = _as_float(params.get("end"))
+    scan_rate = _as_positive_float(params.get("scan_rate"))
+    if start is None or end is None or not scan_rate:
+        return None
+    base = abs(end - start) / scan_rate
+    return base + setup
+
+
+def _dur_pstep(params: Dict[str, Any], setup: float) -> Optional[float]:
+    """PSTEP: number of potentials times step duration."""
+    potentials = params.get("potentials")
+    step_duration = _as_positive_float(params.get("step_duration"))
+    if not isinstance(potentials, list) or not step_duration:
+        return None
+    steps = len(potentials)
+    if steps <= 0:
+        return None
+    base = steps * step_duration
+    return base + setup
+
+
+def _dur_gs(params: Dict[str, Any], setup: float) -> Optional[float]:
+    """GS: number of steps times step duration."""
+    num_steps = _as_positive_int(params.get("num_steps"))
+    step_duration = _as_positive_float(params.get("step_duration"))
+    if not num_steps or not step_duration:
+        return None
+    base = num_steps * step_duration
+    return base + setup
+
+
+def _dur_gcv(params: Dict[str, Any], setup: float) -> Optional[float]:
+    """GCV: steps times step duration times cycles."""
+    num_steps = _as_positive_int(params.get("num_steps"))
+    step_duration = _as_positive_float(params.get("step_duration"))
+    cycles = _as_positive_int(params.get("cycles"))
+    if not num_steps or not step_duration or not cycles:
+        return None
+    base = num_steps * step_duration * max(cycles, 1)
+    return base + setup
+
+
+def _dur_stepseq(params: Dict[str, Any], setup: float) -> Optional[float]:
+    """STEPSEQ: number of currents times step duration."""
+    currents = params.get("currents")
+    step_duration = _as_positive_float(params.get("step_duration"))
+    if not isinstance(currents, list) or not step_duration:
+        return None
+    steps = len(currents)
+    if steps <= 0:
+        return None
+    base = steps * step_duration
+    return base + setup
+
+
+def _dur_dc(params: Dict[str, Any], setup: float) -> Optional[float]:
+    """DC: fixed measurement duration (duration_s)."""
+    duration = _as_positive_float(params.get("duration_s"))
+    if duration is None:
+        return None
+    return duration + setup
+
+
+def _dur_eis(params: Dict[str, Any], setup: float) -> Optional[float]:
+    """EIS: sum of measurement periods over all frequencies."""
+    start_freq = _as_positive_float(params.get("start_freq"))
+    end_freq = _as_positive_float(params.get("end_freq"))
+    points_per_decade = _as_positive_float(params.get("points_per_decade"))
+    cycles_per_freq = _as_positive_float(params.get("cycles_per_freq")) or 3.0
+    if not start_freq or not end_freq or not points_per_decade or not cycles_per_freq:
+        return None
+    spacing = str(params.get("spacing") or "log").strip().lower()
+
+    if math.isclose(start_freq, end_freq, rel_tol=1e-9):
+        total = cycles_per_freq / start_freq
+    else:
+        decades = abs(math.log10(end_freq) - math.log10(start_freq))
+        points = max(int(round(decades * points_per_decade)) + 1, 2)
+        if np is not None and points >= _EIS_VECTORIZE_MIN_POINTS:
+            if spacing == "lin":
+                freqs = np.linspace(start_freq, end_freq, points)
+            else:
+                freqs = np.logspace(math.log10(start_freq), math.log10(end_freq), points)
+            total = float((cycles_per_freq / freqs[freqs > 0]).sum())
         else:
-            decades = abs(math.log10(end_freq) - math.log10(start_freq))
-            points = max(int(round(decades * points_per_decade)) + 1, 2)
             if spacing == "lin":
                 step = (end_freq - start_freq) / (points - 1)
                 freqs = [start_freq + i * step for i in range(points)]
@@ -166,13 +223,36 @@ def estimate_planned_duration(mode: Optional[str], params: Dict[str, Any]) -> Op
                 log_end = math.log10(end_freq)
                 step_log = (log_end - log_start) / (points - 1)
                 freqs = [10 ** (log_start + i * step_log) for i in range(points)]
+            total = sum(cycles_per_freq / f for f in freqs if f and f > 0)
+    if total <= 0:
+        return None
+    return total + setup
+
 
-        total = sum(cycles_per_freq / f for f in freqs if f and f > 0)
-        if total <= 0:
-            return None
-        return total + setup
 
-    return None
+_MODE_DURATION_HANDLERS: Dict[str, Callable[[Dict[str, Any], float], Optional[float]]] = {
+    "CV": _dur_cv,
+    "CA": _dur_chrono,
+    "CP": _dur_chrono,
+    "OCP": _dur_chrono,
+    "LSV": _dur_lsv,
+    "PSTEP": _dur_pstep,
+    "GS": _dur_gs,
+    "GCV": _dur_gcv,
+    "STEPSEQ": _dur_stepseq,
+    "DC": _dur_dc,
+    "EIS": _dur_eis,
+}
+
+
+def estimate_planned_duration(mode: Optional[str], params: Dict[str, Any]) -> Optional[float]:
+    """Estimate measurement duration in seconds based on mode-specific parameters."""
+    if not mode or not params:
+        return None
+    handler = _MODE_DURATION_HANDLERS.get(mode.upper())
+    if handler is None:
+        return None
+    return handler(params, 1.0)
 
 
 def compute_progress(
@@ -189,43 +269,42 @@ def compute_progress(
     if status_norm in {"done", "failed"}:
         return {"progress_pct": 100, "remaining_s": 0}
 
-    slot_list = list(slots)
-    slot_progress: list[int] = []
-    remaining_candidates: list[int] = []
+    # Ein Durchlauf ueber die Slots; Status wird pro Slot genau einmal normalisiert
+    sum_progress = 0
+    count = 0
+    any_running = False
+    best_remaining: Optional[int] = None
 
-    for slot in slot_list:
+    for slot in slots:
+        count += 1
         slot_status = str(slot.get("status") or "").lower()
         if slot_status in {"done", "failed"}:
-            slot_progress.append(100)
-            remaining_candidates.append(0)
-            continue
-        if slot_status == "queued":
-            slot_progress.append(0)
+            sum_progress += 100
+            if best_remaining is None:
+                best_remaining = 0
             continue
-        if slot_status == "running":
-            started = parse_iso(slot.get("started_at")) or parse_iso(started_at)
-            if started and planned_duration_s and planned_duration_s > 0:
-                elapsed = max((now - started).total_seconds(), 0.0)
-                pct = int(round(min(1.0, elapsed / planned_duration_s) * 100))
-                if pct >= 100:
-                    pct = 99
-                slot_progress.append(max(0, pct))
-                remaining_candidates.append(max(int(math.ceil(planned_duration_s - elapsed)), 0))
-            else:
-                slot_progress.append(0)
+        if slot_status != "running":
             continue
-        slot_progress.append(0)
-
-    if not slot_progress:
+        any_running = True
+        started = parse_iso(slot.get("started_at")) or parse_iso(started_at)
+        if started and planned_duration_s and planned_duration_s > 0:
+            elapsed = max((now - started).total_seconds(), 0.0)
+            pct = int(round(min(1.0, elapsed / planned_duration_s) * 100))
+            if pct >= 100:
+                pct = 99
+            sum_progress += max(0, pct)
+            remaining = max(int(math.ceil(planned_duration_s - elapsed)), 0)
+            if best_remaining is None or remaining > best_remaining:
+                best_remaining = remaining
+
+    if not count:
         return {"progress_pct": 0, "remaining_s": None}
 
-    avg_progress = int(round(sum(slot_progress) / len(slot_progress)))
-    if status_norm == "running" and any(str(slot.get("status") or "").lower() == "running" for slot in slot_list):
+    avg_progress = int(round(sum_progress / count))
+    if status_norm == "running" and any_running:
         avg_progress = min(avg_progress, 99)
 
-    if status_norm == "running":
-        remaining_val: Optional[int] = max(remaining_candidates) if remaining_candidates else None
-    else:
-        remaining_val = 0 if status_norm in {"done", "failed"} else None
+    # done/failed wurden oben bereits beantwortet
+    remaining_val: Optional[int] = best_remaining if status_norm == "running" else None
 
     return {"progress_pct": avg_progress, "remaining_s": remaining_val}
@@ -1,13 +1,22 @@
+import atexit
 import json
+import logging
+import os
 import pathlib
 import re
+import shutil
+import subprocess
 import threading
-from typing import Dict, NamedTuple, Optional
+import time
+from typing import Dict, Iterator, NamedTuple, Optional
 
 from fastapi import HTTPException
 
 PATH_SEGMENT_RE = re.compile(r"[^0-9A-Za-z_-]+")
 CLIENT_DATETIME_RE = re.compile(r"[^0-9A-Za-zT_-]+")
+UNDERSCORE_RUN_RE = re.compile(r"_{2,}")
+HYPHEN_RUN_RE = re.compile(r"-{2,}")
+CLIENT_DATETIME_TRANS = str.maketrans({":": "-", " ": "_", "/": "-", "\\": "-", ".": "-"})
 
 
 class RunStorageInfo(NamedTuple):
@@ -20,20 +29,48 @@ class RunStorageInfo(NamedTuple):
 
 RUN_DIRECTORY_LOCK = threading.Lock()
 RUN_DIRECTORIES: Dict[str, pathlib.Path] = {}
+# In-memory copy of _run_paths.json (run_id -> relative path); loaded once, written through on change
+_RUN_INDEX: Dict[str, str] = {}
 _RUNS_ROOT: Optional[pathlib.Path] = None
 
+# Index writes are coalesced: mutations only set the dirty flag, a daemon thread flushes
+_INDEX_FLUSH_INTERVAL_S = 0.1
+# Fehlgeschlagene Hintergrund-Flushes hoechstens so oft loggen (Retry laeuft weiter)
+_INDEX_FLUSH_LOG_INTERVAL_S = 60.0
+_INDEX_DIRTY = threading.Event()
+_INDEX_WRITE_LOCK = threading.Lock()
+_INDEX_FLUSHER: Optional[threading.Thread] = None
+# Zuletzt auf Platte geschriebener Stand; gleicher Snapshot => kein write+rename
+_INDEX_PERSISTED: Dict[str, str] = {}
+
+_log = logging.getLogger("storage")
+
+# rm -rf loescht ganze Run-Baeume mit einem exec statt Python-Dispatch pro Eintrag
+_RM_BINARY = shutil.which("rm") if os.name == "posix" else None
+
 
 def configure_runs_root(root: pathlib.Path) -> None:
     """Configure the base directory used for run storage helpers."""
-    global _RUNS_ROOT
+    global _RUNS_ROOT, _INDEX_FLUSHER
+    if _RUNS_ROOT is not None:
+        flush_run_index()
     _RUNS_ROOT = root
+    stored = _load_run_index_unlocked()
+    with _INDEX_WRITE_LOCK:
+        _INDEX_PERSISTED.clear()
+        _INDEX_PERSISTED.update(stored)
     with RUN_DIRECTORY_LOCK:
         RUN_DIRECTORIES.clear()
-        stored = _load_run_index_unlocked()
+        _RUN_INDEX.clear()
+        _RUN_INDEX.update(stored)
         for rid, rel in stored.items():
             candidate = root / pathlib.Path(rel)
             if candidate.is_dir():
                 RUN_DIRECTORIES[rid] = candidate
+        if _INDEX_FLUSHER is None:
+            _INDEX_FLUSHER = threading.Thread(target=_index_flush_loop, daemon=True, name="run-index-flush")
+            _INDEX_FLUSHER.start()
+            atexit.register(flush_run_index)
 
 
 def run_index_path() -> pathlib.Path:
@@ -54,8 +91,8 @@ def sanitize_path_segment(raw: str, field_name: str) -> str:
     if not trimmed:
         raise HTTPException(400, f"{field_name} darf nicht leer sein")
     sanitized = PATH_SEGMENT_RE.sub("_", trimmed)
-    sanitized = re.sub(r"_+", "_", sanitized)
-    sanitized = re.sub(r"-+", "-", sanitized)
+    sanitized = UNDERSCORE_RUN_RE.sub("_", sanitized)
+    sanitized = HYPHEN_RUN_RE.sub("-", sanitized)
     sanitized = sanitized.strip("_-")
     if not sanitized:
         raise HTTPException(400, f"{field_name} ist ungueltig")
@@ -73,16 +110,10 @@ def sanitize_client_datetime(raw: str) -> str:
     trimmed = (raw or "").strip()
     if not trimmed:
         raise HTTPException(400, "client_datetime darf nicht leer sein")
-    normalized = (
-        trimmed.replace(":", "-")
-        .replace(" ", "_")
-        .replace("/", "-")
-        .replace("\\", "-")
-        .replace(".", "-")
-    )
+    normalized = trimmed.translate(CLIENT_DATETIME_TRANS)
     sanitized = CLIENT_DATETIME_RE.sub("-", normalized)
-    sanitized = re.sub(r"-{2,}", "-", sanitized)
-    sanitized = re.sub(r"_{2,}", "_", sanitized)
+    sanitized = HYPHEN_RUN_RE.sub("-", sanitized)
+    sanitized = UNDERSCORE_RUN_RE.sub("_", sanitized)
     sanitized = sanitized.strip("_-")
     if not sanitized:
         raise HTTPException(400, "client_datetime ist ungueltig")
@@ -98,53 +129,165 @@ def record_run_directory(run_id: str, run_dir: pathlib.Path) -> None:
     rel_str = rel.as_posix()
     with RUN_DIRECTORY_LOCK:
         RUN_DIRECTORIES[run_id] = run_dir
-        data = _load_run_index_unlocked()
-        data[run_id] = rel_str
-        _write_run_index_unlocked(data)
+        if _RUN_INDEX.get(run_id) == rel_str:
+            return
+        _RUN_INDEX[run_id] = rel_str
+    _INDEX_DIRTY.set()
 
 
 def forget_run_directory(run_id: str) -> None:
     """Remove a run directory mapping from memory and disk."""
     with RUN_DIRECTORY_LOCK:
         RUN_DIRECTORIES.pop(run_id, None)
-        data = _load_run_index_unlocked()
-        if run_id in data:
-            data.pop(run_id, None)
-            if data:
-                _write_run_index_unlocked(data)
+        if _RUN_INDEX.pop(run_id, None) is None:
+            return
+    _INDEX_DIRTY.set()
+
+
+def flush_run_index() -> None:
+    """Write pending run index changes to disk (no-op when nothing changed)."""
+    with _INDEX_WRITE_LOCK:
+        if not _INDEX_DIRTY.is_set():
+            return
+        _INDEX_DIRTY.clear()
+        with RUN_DIRECTORY_LOCK:
+            snapshot = dict(_RUN_INDEX)
+        if snapshot == _INDEX_PERSISTED:
+            return
+        try:
+            if snapshot:
+                _write_run_index_unlocked(snapshot)
             else:
-                path = run_index_path()
                 try:
-                    path.unlink()
+                    run_index_path().unlink()
                 except FileNotFoundError:
                     pass
+        except Exception:
+            # naechster Flush versucht es erneut
+            _INDEX_DIRTY.set()
+            raise
+        _INDEX_PERSISTED.clear()
+        _INDEX_PERSISTED.update(snapshot)
+
+
+def _index_flush_loop() -> None:
+    last_logged = 0.0
+    suppressed = 0
+    while True:
+        _INDEX_DIRTY.wait()
+        # kurzes Sammelfenster, damit mehrere Runs in einem Schreibvorgang landen
+        time.sleep(_INDEX_FLUSH_INTERVAL_S)
+        try:
+            flush_run_index()
+        except Exception:
+            # z.B. Platte voll / fehlende Rechte: sonst bliebe der Index unbemerkt veraltet
+            now = time.monotonic()
+            if now - last_logged >= _INDEX_FLUSH_LOG_INTERVAL_S:
+                _log.exception(
+                    "Run index flush failed; retrying (%d failures since last report)",
+                    suppressed,
+                )
+                last_logged, suppressed = now, 0
+            else:
+                suppressed += 1
+            time.sleep(1.0)
 
 
 def resolve_run_directory(run_id: str) -> pathlib.Path:
     """Return the directory for a run or raise HTTP 404 if unknown."""
-    with RUN_DIRECTORY_LOCK:
-        candidate = RUN_DIRECTORIES.get(run_id)
+    # Lock-free reads: single-key dict lookups are atomic; RUN_DIRECTORY_LOCK only orders writers
+    candidate = RUN_DIRECTORIES.get(run_id)
     if candidate and candidate.is_dir():
         return candidate
 
-    data = _load_run_index_unlocked()
-    rel = data.get(run_id)
+    rel = _RUN_INDEX.get(run_id)
     if rel:
         run_dir = _require_root() / pathlib.Path(rel)
         if run_dir.is_dir():
-            with RUN_DIRECTORY_LOCK:
-                RUN_DIRECTORIES[run_id] = run_dir
-            return run_dir
+            return RUN_DIRECTORIES.setdefault(run_id, run_dir)
 
     fallback = _require_root() / run_id
     if fallback.is_dir():
-        with RUN_DIRECTORY_LOCK:
-            RUN_DIRECTORIES[run_id] = fallback
-        return fallback
+        return RUN_DIRECTORIES.setdefault(run_id, fallback)
 
     raise HTTPException(404, "Run nicht gefunden")
 
 
+def _is_inner_file_link(entry: os.DirEntry, real_root: str) -> bool:
+    """True for a symlink that resolves to a regular file inside real_root."""
+    # Verzeichnis-Links werden nie verfolgt (Zyklen); Datei-Links nur innerhalb des Runs,
+    # damit Listing/ZIP dieselben Dateien zeigen wie get_run_file
+    if not entry.is_symlink():
+        return False
+    target = os.path.realpath(entry.path)
+    try:
+        inside = os.path.commonpath([real_root, target]) == real_root
+    except ValueError:
+        return False
+    return inside and os.path.isfile(target)
+
+
+def iter_files(root: "os.PathLike[str] | str") -> Iterator[os.DirEntry]:
+    """Yield all regular files below root using os.scandir (no extra stat per entry).
+
+    Symlinked files are included when they resolve inside root; symlinked
+    directories and links pointing outside root are skipped.
+    """
+    top = os.fspath(root)
+    real_root = os.path.realpath(top)
+    stack = [top]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False) or _is_inner_file_link(entry, real_root):
+                        yield entry
+        except OSError:
+            continue
+
+
+def count_files(root: "os.PathLike[str] | str") -> int:
+    """Count regular files below root without materializing a list."""
+    # eigene Schleife statt iter_files: kein Generator-Resume pro Datei
+    count = 0
+    top = os.fspath(root)
+    real_root = os.path.realpath(top)
+    stack = [top]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False) or _is_inner_file_link(entry, real_root):
+                        count += 1
+        except OSError:
+            continue
+    return count
+
+
+def remove_tree(path: "os.PathLike[str] | str") -> None:
+    """Delete a directory tree (rm -rf where available, shutil.rmtree otherwise)."""
+    target = os.fspath(path)
+    if _RM_BINARY:
+        res = subprocess.run(
+            [_RM_BINARY, "-rf", "--", target],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=False,
+        )
+        if res.returncode == 0:
+            return
+        if not os.path.lexists(target):
+            return
+    shutil.rmtree(target)
+
+
 def _require_root() -> pathlib.Path:
     if _RUNS_ROOT is None:
         raise RuntimeError("RUNS_ROOT wurde noch nicht konfiguriert")
@@ -1,13 +1,26 @@
 from __future__ import annotations
 
+import functools
+import math
+import re
+import sys
+from dataclasses import dataclass
 from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, computed_field
+
+try:
+    import numpy as np  # kommt ohnehin mit pyBEEP
+except ImportError:  # pragma: no cover - Batch faellt auf die Einzelvalidierung zurueck
+    np = None  # type: ignore
 
 
 class ValidationIssue(BaseModel):
     """Machine-readable description of a single validation finding."""
 
+    # Schema wird erst beim ersten Validieren/Serialisieren gebaut (Import bleibt schlank).
+    model_config = ConfigDict(defer_build=True, frozen=True, extra="forbid")
+
     field: str = Field(..., description="Name of the validated parameter field")
     code: str = Field(..., description="Stable error or warning code")
     message: str = Field(..., description="Human-readable explanation of the issue")
@@ -16,7 +29,10 @@ class ValidationIssue(BaseModel):
 class ValidationResult(BaseModel):
     """Structured validation response used by the GUI validation endpoint."""
 
-    ok: bool = Field(..., description="Flag indicating validation success")
+    # extra="ignore": serialisierte Antworten enthalten "ok" und sollen sich
+    # weiterhin zurueck einlesen lassen.
+    model_config = ConfigDict(defer_build=True, frozen=True, extra="ignore")
+
     errors: List[ValidationIssue] = Field(
         default_factory=list, description="Blocking validation errors"
     )
@@ -24,61 +40,214 @@ class ValidationResult(BaseModel):
         default_factory=list, description="Non-blocking validation hints"
     )
 
+    @computed_field(description="Flag indicating validation success")
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+@functools.lru_cache(maxsize=None)
+def _issue_list_adapter() -> TypeAdapter:
+    # Erst beim ersten Export bauen, passend zu defer_build der Modelle.
+    return TypeAdapter(List[ValidationIssue])
+
+
+def result_to_dict(result: ValidationResult) -> Dict[str, Any]:
+    """Serialize a ValidationResult to plain data via the cached issue-list adapter."""
+
+    adapter = _issue_list_adapter()
+    return {
+        "ok": result.ok,
+        "errors": adapter.dump_python(result.errors),
+        "warnings": adapter.dump_python(result.warnings),
+    }
+
 
 class UnsupportedModeError(RuntimeError):
     """Raised when no validator exists for the requested mode."""
 
 
+@dataclass(slots=True, frozen=True)
+class _Issue:
+    """Internal issue record; converted to ValidationIssue only at the API boundary."""
+
+    field: str
+    code: str
+    message: str
+
+
+# Validators return (errors, warnings) as plain _Issue lists.
+_Findings = Tuple[List[_Issue], List[_Issue]]
+
+
+def _issue(field: str, code: str, message: str) -> _Issue:
+    """Build an internal issue record from trusted literals."""
+
+    return _Issue(field, code, message)
+
+
+def _export(issues: List[_Issue]) -> List[ValidationIssue]:
+    """Convert internal issue records into response models without re-validation."""
+
+    construct = ValidationIssue.model_construct
+    return [construct(field=i.field, code=i.code, message=i.message) for i in issues]
+
+
+# ---------- Issue templates ----------
+# Fixed (code, message) pairs are built once at import; per-field issues are cloned
+# from the template so each request only swaps in the field name.
+_MISSING_FIELD = _issue("", "missing_field", "Field is required.")
+_NOT_A_NUMBER = _issue("", "not_a_number", "Value must be numeric.")
+_NOT_AN_INTEGER = _issue("", "not_an_integer", "Value must be an integer.")
+_MUST_BE_POSITIVE = _issue(
+    "", "must_be_positive", "Value must be greater than zero."
+)
+
+_ZERO_SWEEP = _issue(
+    "end", "zero_sweep", "Potential sweep must span at least one vertex."
+)
+_HIGH_SCAN_RATE = _issue(
+    "scan_rate",
+    "high_value",
+    "Scan rate exceeds 5 V/s; verify hardware capability.",
+)
+_HIGH_CYCLES = _issue(
+    "cycles",
+    "high_value",
+    "Cycle count above 50 may lead to long experiment times.",
+)
+
+_NOT_IMPL_DC = _issue(
+    "*",
+    "not_implemented",
+    "DC validation is not yet implemented; values were not checked.",
+)
+_NOT_IMPL_AC = _issue(
+    "*",
+    "not_implemented",
+    "AC validation is not yet implemented; values were not checked.",
+)
+_NOT_IMPL_LSV = _issue(
+    "*",
+    "not_implemented",
+    "LSV validation is not yet implemented; values were not checked.",
+)
+_NOT_IMPL_EIS = _issue(
+    "*",
+    "not_implemented",
+    "EIS validation is not yet implemented; values were not checked.",
+)
+_NOT_IMPL_CDL = _issue(
+    "*",
+    "not_implemented",
+    "CDL validation is not yet implemented; values were not checked.",
+)
+_NOT_IMPL_CA = _issue(
+    "*",
+    "not_implemented",
+    "CDL validation is not yet implemented; values were not checked.",
+)
+
+
+def _with_field(template: _Issue, field: str) -> _Issue:
+    """Clone a prebuilt issue template for a concrete field."""
+
+    return _Issue(field, template.code, template.message)
+
+
+# Violation bits for _coerce_float: positive / minimum / maximum.
+_BOUND_POSITIVE = 1
+_BOUND_MIN = 2
+_BOUND_MAX = 4
+# NaN als "keine Grenze": jeder Vergleich dagegen ist False.
+_UNBOUNDED = math.nan
+
+
+def _check_float_bounds(number: float, lo: float, hi: float, positive: bool) -> int:
+    """Return the violation bitmask for one value; NaN bounds count as unbounded.
+
+    Uses only comparisons, & | and <<, so it works unchanged on NumPy arrays.
+    """
+
+    return (positive & (number <= 0)) | ((number < lo) << 1) | ((number > hi) << 2)
+
+
+@functools.lru_cache(maxsize=64, typed=True)
+def _bound_issues(
+    mask: int, minimum: Optional[float], maximum: Optional[float]
+) -> Tuple[_Issue, ...]:
+    """Return the issue templates for a violation bitmask, in reporting order."""
+
+    templates: List[_Issue] = []
+    if mask & _BOUND_POSITIVE:
+        templates.append(_MUST_BE_POSITIVE)
+    if mask & _BOUND_MIN:
+        templates.append(_bound_template(_MIN_VALUE_ISSUES, minimum, "min_value"))
+    if mask & _BOUND_MAX:
+        templates.append(_bound_template(_MAX_VALUE_ISSUES, maximum, "max_value"))
+    return tuple(templates)
+
+
+def _bound_template(
+    table: Dict[float, _Issue], bound: Optional[float], code: str
+) -> _Issue:
+    # Nur echte floats nachschlagen: 10 == 10.0, wuerde aber als "10" formatiert.
+    if type(bound) is float and bound in table:
+        return table[bound]
+    if code == "min_value":
+        return _issue("", code, f"Value must be at least {bound}.")
+    return _issue("", code, f"Value must be at most {bound}.")
+
+
 def _is_empty(value: Any) -> bool:
     """Return True when a value counts as empty for validation purposes."""
 
     if value is None:
         return True
     if isinstance(value, str):
-        return not value.strip()
+        # isspace() prueft ohne Kopie; "" muss vorher raus (isspace() ist dort False).
+        return not value or value.isspace()
     return False
 
 
+# Plain decimal / exponent notation; everything else takes the float() fallback.
+_NUM_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def _to_float(raw: Any) -> Optional[float]:
+    """Convert a raw payload value to float, or return None if it is not numeric."""
+
+    kind = type(raw)
+    if kind is float:
+        return raw
+    if kind is str:
+        text = raw.strip()
+        if _NUM_RE.fullmatch(text):
+            return float(text)
+    # Seltener Rest (int, bool, "inf", "1_000", Decimal, ...): float() entscheidet.
+    try:
+        return float(raw)
+    except Exception:
+        return None
+
+
 def _require_fields(
     payload: Dict[str, Any],
     fields: Iterable[str],
     *,
-    errors: List[ValidationIssue],
+    errors: List[_Issue],
 ) -> None:
     """Append missing_field errors for each required key."""
 
     for name in fields:
         if _is_empty(payload.get(name)):
-            errors.append(
-                ValidationIssue(
-                    field=name,
-                    code="missing_field",
-                    message="Field is required.",
-                )
-            )
-
-
-def _warn_not_implemented(
-    warnings: List[ValidationIssue],
-    *,
-    field: str = "*",
-    message: str = "Validation rules are not yet implemented for this mode.",
-) -> None:
-    """Attach a placeholder warning indicating incomplete implementation."""
-
-    warnings.append(
-        ValidationIssue(
-            field=field,
-            code="not_implemented",
-            message=message,
-        )
-    )
+            errors.append(_with_field(_MISSING_FIELD, name))
 
 
 def _coerce_float(
     field: str,
     payload: Dict[str, Any],
-    errors: List[ValidationIssue],
+    errors: List[_Issue],
     *,
     positive: bool = False,
     minimum: Optional[float] = None,
@@ -88,49 +257,24 @@ def _coerce_float(
 
     raw = payload.get(field, None)
     if _is_empty(raw):
-        errors.append(
-            ValidationIssue(field=field, code="missing_field", message="Field is required.")
-        )
+        errors.append(_with_field(_MISSING_FIELD, field))
         return None
 
-    try:
-        number = float(raw)
-    except Exception:
-        errors.append(
-            ValidationIssue(
-                field=field,
-                code="not_a_number",
-                message="Value must be numeric.",
-            )
-        )
+    number = _to_float(raw)
+    if number is None:
+        errors.append(_with_field(_NOT_A_NUMBER, field))
         return None
 
-    if positive and number <= 0:
-        errors.append(
-            ValidationIssue(
-                field=field,
-                code="must_be_positive",
-                message="Value must be greater than zero.",
-            )
-        )
-
-    if minimum is not None and number < minimum:
-        errors.append(
-            ValidationIssue(
-                field=field,
-                code="min_value",
-                message=f"Value must be at least {minimum}.",
-            )
-        )
-
-    if maximum is not None and number > maximum:
-        errors.append(
-            ValidationIssue(
-                field=field,
-                code="max_value",
-                message=f"Value must be at most {maximum}.",
-            )
-        )
+    # Alle Grenzen in einem Ausdruck pruefen; Templates nur bei Verletzung nachschlagen.
+    mask = _check_float_bounds(
+        number,
+        _UNBOUNDED if minimum is None else minimum,
+        _UNBOUNDED if maximum is None else maximum,
+        positive,
+    )
+    if mask:
+        for template in _bound_issues(mask, minimum, maximum):
+            errors.append(_with_field(template, field))
 
     return number
 
@@ -138,7 +282,7 @@ def _coerce_float(
 def _coerce_int(
     field: str,
     payload: Dict[str, Any],
-    errors: List[ValidationIssue],
+    errors: List[_Issue],
     *,
     positive: bool = False,
 ) -> Optional[int]:
@@ -146,216 +290,242 @@ def _coerce_int(
 
     raw = payload.get(field, None)
     if _is_empty(raw):
-        errors.append(
-            ValidationIssue(field=field, code="missing_field", message="Field is required.")
-        )
+        errors.append(_with_field(_MISSING_FIELD, field))
         return None
 
-    try:
-        number = int(float(raw))
-    except Exception:
-        errors.append(
-            ValidationIssue(
-                field=field,
-                code="not_an_integer",
-                message="Value must be an integer.",
-            )
-        )
+    value = _to_float(raw)
+    if value is None or not math.isfinite(value):
+        errors.append(_with_field(_NOT_AN_INTEGER, field))
         return None
+    number = int(value)
 
     if positive and number <= 0:
-        errors.append(
-            ValidationIssue(
-                field=field,
-                code="must_be_positive",
-                message="Value must be greater than zero.",
-            )
-        )
+        errors.append(_with_field(_MUST_BE_POSITIVE, field))
 
     return number
 
 
-def _validate_cv_params(payload: Dict[str, Any]) -> ValidationResult:
+# CV-Grenzen, gemeinsam fuer Einzel- und Batch-Validierung.
+_CV_VOLTAGE_BOUNDS = (-10.0, 10.0)
+_CV_SCAN_RATE_WARN = 5.0
+_CV_CYCLES_WARN = 50
+_CV_FIELDS = ("start", "vertex1", "vertex2", "end", "scan_rate", "cycles")
+_CV_VOLTAGE_FIELDS = _CV_FIELDS[:4]
+
+# Bekannte Grenzen mit fertigen min/max-Templates; unbekannte werden formatiert.
+_MIN_VALUE_ISSUES: Dict[float, _Issue] = {
+    lo: _issue("", "min_value", f"Value must be at least {lo}.")
+    for lo in (_CV_VOLTAGE_BOUNDS[0],)
+}
+_MAX_VALUE_ISSUES: Dict[float, _Issue] = {
+    hi: _issue("", "max_value", f"Value must be at most {hi}.")
+    for hi in (_CV_VOLTAGE_BOUNDS[1],)
+}
+
+# Unterhalb dieser Batchgroesse lohnt sich der NumPy-Vorfilter nicht.
+_BATCH_VECTORIZE_MIN = 16
+
+
+def _validate_cv_params(payload: Dict[str, Any]) -> _Findings:
     """Validate CV parameters against lab safety limits and simple heuristics."""
 
-    errors: List[ValidationIssue] = []
-    warnings: List[ValidationIssue] = []
-    voltage_bounds = (-10.0, 10.0)
+    errors: List[_Issue] = []
+    warnings: List[_Issue] = []
+    lo, hi = _CV_VOLTAGE_BOUNDS
+    too_low, too_high = _MIN_VALUE_ISSUES[lo], _MAX_VALUE_ISSUES[hi]
+
+    # Die vier Spannungen teilen dieselben festen Grenzen: _coerce_float hier
+    # ausgeschrieben (lo < hi, also hoechstens eine der beiden Verletzungen).
+    volts: List[Optional[float]] = []
+    for name in _CV_VOLTAGE_FIELDS:
+        raw = payload.get(name)
+        if _is_empty(raw):
+            errors.append(_with_field(_MISSING_FIELD, name))
+            volts.append(None)
+            continue
+        number = _to_float(raw)
+        if number is None:
+            errors.append(_with_field(_NOT_A_NUMBER, name))
+        elif number < lo:
+            errors.append(_with_field(too_low, name))
+        elif number > hi:
+            errors.append(_with_field(too_high, name))
+        volts.append(number)
+    start, vertex1, vertex2, end = volts
 
-    start = _coerce_float(
-        "start",
-        payload,
-        errors,
-        minimum=voltage_bounds[0],
-        maximum=voltage_bounds[1],
-    )
-    vertex1 = _coerce_float(
-        "vertex1",
-        payload,
-        errors,
-        minimum=voltage_bounds[0],
-        maximum=voltage_bounds[1],
-    )
-    vertex2 = _coerce_float(
-        "vertex2",
-        payload,
-        errors,
-        minimum=voltage_bounds[0],
-        maximum=voltage_bounds[1],
-    )
-    end = _coerce_float(
-        "end",
-        payload,
-        errors,
-        minimum=voltage_bounds[0],
-        maximum=voltage_bounds[1],
-    )
     scan_rate = _coerce_float("scan_rate", payload, errors, positive=True)
     cycles = _coerce_int("cycles", payload, errors, positive=True)
 
-    if (
-        start is not None
-        and vertex1 is not None
-        and vertex2 is not None
-        and end is not None
-        and start == vertex1 == vertex2 == end
-    ):
-        errors.append(
-            ValidationIssue(
-                field="end",
-                code="zero_sweep",
-                message="Potential sweep must span at least one vertex.",
-            )
-        )
-
-    if scan_rate is not None and scan_rate > 5.0:
-        warnings.append(
-            ValidationIssue(
-                field="scan_rate",
-                code="high_value",
-                message="Scan rate exceeds 5 V/s; verify hardware capability.",
-            )
-        )
-
-    if cycles is not None and cycles > 50:
-        warnings.append(
-            ValidationIssue(
-                field="cycles",
-                code="high_value",
-                message="Cycle count above 50 may lead to long experiment times.",
-            )
-        )
-
-    ok = not errors
-    return ValidationResult(ok=ok, errors=errors, warnings=warnings)
-
-
-def _validate_dc_params(payload: Dict[str, Any]) -> ValidationResult:
-    """Placeholder validation for DC mode (chronoamperometry / chrono)."""
-
-    errors: List[ValidationIssue] = []
-    warnings: List[ValidationIssue] = []
-    required = ("duration_s", "voltage_v")
-    _require_fields(payload, required, errors=errors)
-    _warn_not_implemented(
-        warnings,
-        message="DC validation is not yet implemented; values were not checked.",
-    )
-    ok = not errors
-    return ValidationResult(ok=ok, errors=errors, warnings=warnings)
+    # Kette statt max()==min(): bei NaN-Werten liefern max/min je nach Position
+    # ein "gleiches" Paar, der Vergleich per == bleibt korrekt False.
+    if None not in volts and start == vertex1 == vertex2 == end:
+        errors.append(_ZERO_SWEEP)
+
+    if scan_rate is not None and scan_rate > _CV_SCAN_RATE_WARN:
+        warnings.append(_HIGH_SCAN_RATE)
+
+    if cycles is not None and cycles > _CV_CYCLES_WARN:
+        warnings.append(_HIGH_CYCLES)
+
+    return errors, warnings
+
+
+def _make_placeholder(
+    required: Tuple[str, ...], template: _Issue
+) -> Callable[[Dict[str, Any]], _Findings]:
+    """Build a placeholder validator: required fields plus a not_implemented warning."""
+
+    def _validate(payload: Dict[str, Any]) -> _Findings:
+        errors: List[_Issue] = []
+        _require_fields(payload, required, errors=errors)
+        return errors, [template]
+
+    return _validate
+
+
+# Platzhalter bis die eigentlichen Regeln pro Modus existieren.
+_validate_dc_params = _make_placeholder(  # chronoamperometry / chrono
+    ("duration_s", "voltage_v"), _NOT_IMPL_DC
+)
+_validate_ac_params = _make_placeholder(  # chrono AC pulses
+    ("duration_s", "frequency_hz", "voltage_v"), _NOT_IMPL_AC
+)
+_validate_lsv_params = _make_placeholder(  # linear sweep voltammetry
+    ("start", "end", "scan_rate"), _NOT_IMPL_LSV
+)
+_validate_eis_params = _make_placeholder(  # electrochemical impedance spectroscopy
+    ("freq_start_hz", "freq_end_hz", "points", "spacing"), _NOT_IMPL_EIS
+)
+_validate_cdl_params = _make_placeholder(  # capacitance measurement
+    ("vertex_a_v", "vertex_b_v", "cycles"), _NOT_IMPL_CDL
+)
+_validate_ca_params = _make_placeholder(("duration", "potential"), _NOT_IMPL_CA)
+
+
+# Read-only stand-in for a missing payload; validators only ever call .get().
+_EMPTY: Dict[str, Any] = {}
+
+_MODE_VALIDATORS: Dict[str, Callable[[Dict[str, Any]], _Findings]] = {
+    sys.intern(key): validator
+    for key, validator in {
+        "CV": _validate_cv_params,
+        "DC": _validate_dc_params,
+        "AC": _validate_ac_params,
+        "LSV": _validate_lsv_params,
+        "EIS": _validate_eis_params,
+        "CDL": _validate_cdl_params,
+        "CA": _validate_ca_params,
+    }.items()
+}
 
 
-def _validate_ac_params(payload: Dict[str, Any]) -> ValidationResult:
-    """Placeholder validation for AC mode (chrono AC pulses)."""
+def _resolve_validator(mode: str) -> Callable[[Dict[str, Any]], _Findings]:
+    """Look up the validator for a mode or raise UnsupportedModeError."""
+
+    # Fast path: die GUI sendet kanonische Modusnamen, upper() nur bei Fehltreffer.
+    validator = _MODE_VALIDATORS.get(mode)
+    if validator is None:
+        validator = _MODE_VALIDATORS.get((mode or "").upper())
+    if not validator:
+        raise UnsupportedModeError(f"Unsupported mode '{mode}'.")
+    return validator
 
-    errors: List[ValidationIssue] = []
-    warnings: List[ValidationIssue] = []
-    required = ("duration_s", "frequency_hz", "voltage_v")
-    _require_fields(payload, required, errors=errors)
-    _warn_not_implemented(
-        warnings,
-        message="AC validation is not yet implemented; values were not checked.",
-    )
-    ok = not errors
-    return ValidationResult(ok=ok, errors=errors, warnings=warnings)
 
+# Geteiltes "alles ok"-Ergebnis; wie die gecachten Ergebnisse nur lesen.
+_OK_EMPTY = ValidationResult.model_construct(errors=[], warnings=[])
 
-def _validate_lsv_params(payload: Dict[str, Any]) -> ValidationResult:
-    """Placeholder validation for LSV mode (linear sweep voltammetry)."""
 
-    errors: List[ValidationIssue] = []
-    warnings: List[ValidationIssue] = []
-    required = ("start", "end", "scan_rate")
-    _require_fields(payload, required, errors=errors)
-    _warn_not_implemented(
-        warnings,
-        message="LSV validation is not yet implemented; values were not checked.",
+def _to_result(findings: _Findings) -> ValidationResult:
+    errors, warnings = findings
+    if not errors and not warnings:
+        return _OK_EMPTY
+    return ValidationResult.model_construct(
+        errors=_export(errors), warnings=_export(warnings)
     )
-    ok = not errors
-    return ValidationResult(ok=ok, errors=errors, warnings=warnings)
 
 
-def _validate_eis_params(payload: Dict[str, Any]) -> ValidationResult:
-    """Placeholder validation for EIS mode (electrochemical impedance spectroscopy)."""
+# GUI validiert bei jedem Tastendruck; meist mit unveraendertem Payload.
+_RESULT_CACHE_SIZE = 512
 
-    errors: List[ValidationIssue] = []
-    warnings: List[ValidationIssue] = []
-    required = ("freq_start_hz", "freq_end_hz", "points", "spacing")
-    _require_fields(payload, required, errors=errors)
-    _warn_not_implemented(
-        warnings,
-        message="EIS validation is not yet implemented; values were not checked.",
-    )
-    ok = not errors
-    return ValidationResult(ok=ok, errors=errors, warnings=warnings)
 
+@functools.lru_cache(maxsize=_RESULT_CACHE_SIZE)
+def _validate_cached(
+    validator: Callable[[Dict[str, Any]], _Findings], key: frozenset
+) -> ValidationResult:
+    return _to_result(validator(dict(key)))
 
-def _validate_cdl_params(payload: Dict[str, Any]) -> ValidationResult:
-    """Placeholder validation for CDL mode (capacitance measurement)."""
 
-    errors: List[ValidationIssue] = []
-    warnings: List[ValidationIssue] = []
-    required = ("vertex_a_v", "vertex_b_v", "cycles")
-    _require_fields(payload, required, errors=errors)
-    _warn_not_implemented(
-        warnings,
-        message="CDL validation is not yet implemented; values were not checked.",
-    )
-    ok = not errors
-    return ValidationResult(ok=ok, errors=errors, warnings=warnings)
-
-def _validate_ca_params(payload: Dict[str, Any]) -> ValidationResult:
-    """Placeholder validation for CDL mode (capacitance measurement)."""
-
-    errors: List[ValidationIssue] = []
-    warnings: List[ValidationIssue] = []
-    required = ("duration", "potential")
-    _require_fields(payload, required, errors=errors)
-    _warn_not_implemented(
-        warnings,
-        message="CDL validation is not yet implemented; values were not checked.",
-    )
-    ok = not errors
-    return ValidationResult(ok=ok, errors=errors, warnings=warnings)
-
-
-_MODE_VALIDATORS: Dict[str, Callable[[Dict[str, Any]], ValidationResult]] = {
-    "CV": _validate_cv_params,
-    "DC": _validate_dc_params,
-    "AC": _validate_ac_params,
-    "LSV": _validate_lsv_params,
-    "EIS": _validate_eis_params,
-    "CDL": _validate_cdl_params,
-    "CA": _validate_ca_params,
-}
+def validate_mode_payload(mode: str, params: Dict[str, Any]) -> ValidationResult:
+    """Run the configured validator for a mode or raise UnsupportedModeError.
 
+    Results for hashable payloads are memoized and shared between callers;
+    treat the returned model as read-only.
+    """
 
-def validate_mode_payload(mode: str, params: Dict[str, Any]) -> ValidationResult:
-    """Run the configured validator for a mode or raise UnsupportedModeError."""
+    validator = _resolve_validator(mode)
+    payload = params if params is not None else _EMPTY
+    try:
+        key = frozenset(payload.items())
+    except TypeError:  # unhashable values (lists, dicts): validate uncached
+        return _to_result(validator(payload))
+    return _validate_cached(validator, key)
 
-    mode_key = (mode or "").upper()
-    validator = _MODE_VALIDATORS.get(mode_key)
-    if not validator:
-        raise UnsupportedModeError(f"Unsupported mode '{mode}'.")
 
-    return validator(dict(params or {}))
+def _float_or_nan(raw: Any) -> float:
+    """Coerce a raw CV value for the batch screen; anything unusable becomes NaN."""
+
+    if _is_empty(raw):
+        return math.nan
+    number = _to_float(raw)
+    return math.nan if number is None else number
+
+
+def _screen_cv_batch(payloads: List[Dict[str, Any]]) -> Any:
+    """Flag CV payloads that would produce any issue, in one vectorized pass.
+
+    Missing or non-numeric values become NaN and are flagged; flagged rows are
+    re-run through _validate_cv_params so issue lists stay identical.
+    """
+
+    arr = np.fromiter(
+        (_float_or_nan(p.get(f)) for p in payloads for f in _CV_FIELDS),
+        dtype=np.float64,
+        count=len(payloads) * len(_CV_FIELDS),
+    ).reshape(-1, len(_CV_FIELDS))
+    volts = arr[:, :4]
+    lo, hi = _CV_VOLTAGE_BOUNDS
+
+    flagged = np.isnan(arr).any(axis=1)
+    flagged |= (_check_float_bounds(volts, lo, hi, False) != 0).any(axis=1)
+    flagged |= (volts == volts[:, :1]).all(axis=1)  # zero_sweep
+    scan_rate = arr[:, 4]
+    cycles = np.trunc(arr[:, 5])  # wie _coerce_int: auf int gekuerzt
+    flagged |= _check_float_bounds(scan_rate, _UNBOUNDED, _CV_SCAN_RATE_WARN, True) != 0
+    flagged |= _check_float_bounds(cycles, _UNBOUNDED, _CV_CYCLES_WARN, True) != 0
+    return flagged
+
+
+def validate_mode_payloads_batch(
+    mode: str, payloads: List[Dict[str, Any]]
+) -> List[ValidationResult]:
+    """Validate many payloads for one mode (e.g. a GUI parameter sweep).
+
+    For larger CV batches a NumPy pre-screen marks the clean rows in one pass;
+    only flagged rows go through the regular per-payload validator.
+    """
+
+    validator = _resolve_validator(mode)
+    items = [p if p is not None else _EMPTY for p in payloads]
+
+    if (
+        validator is _validate_cv_params
+        and np is not None
+        and len(items) >= _BATCH_VECTORIZE_MIN
+    ):
+        flagged = _screen_cv_batch(items).tolist()
+        return [
+            _to_result(validator(p)) if bad else _OK_EMPTY
+            for p, bad in zip(items, flagged)
+        ]
+
+    return [_to_result(validator(p)) for p in items]
@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rest_api"))
+
+import storage  # noqa: E402
+from nas_common import parse_rsync_stats, synced_file_count  # noqa: E402
+
+# rsync -a --stats fuer einen Run mit zwei Dateien und einem Datei-Symlink
+RSYNC_STATS_WITH_LINK = """
+Number of files: 4 (reg: 2, dir: 1, link: 1)
+Number of created files: 3 (reg: 2, link: 1)
+Number of deleted files: 0
+Number of regular files transferred: 2
+Total file size: 12 bytes
+"""
+
+
+class RunWithSymlinkTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.run_dir = self._tmp.name
+        for name in ("a.csv", "b.png"):
+            with open(os.path.join(self.run_dir, name), "w", encoding="utf-8") as fh:
+                fh.write("data\n")
+        os.symlink(os.path.join(self.run_dir, "a.csv"), os.path.join(self.run_dir, "latest.csv"))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_count_files_includes_inner_file_link(self):
+        self.assertEqual(storage.count_files(self.run_dir), 3)
+
+    def test_rsync_stats_cover_linked_file(self):
+        stats = parse_rsync_stats(RSYNC_STATS_WITH_LINK)
+        self.assertEqual((stats["reg"], stats["link"]), (2, 1))
+        self.assertGreaterEqual(synced_file_count(stats), storage.count_files(self.run_dir))
+
+    def test_stats_without_breakdown(self):
+        self.assertEqual(synced_file_count(parse_rsync_stats("Number of files: 5\n")), 5)
+        self.assertEqual(synced_file_count(parse_rsync_stats("reg: 2\n")), None)
+        self.assertEqual(synced_file_count(parse_rsync_stats("Number of files: 4 (reg: 3, dir: 1)\n")), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()